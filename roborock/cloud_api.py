@@ -63,6 +63,9 @@ class RoborockMqttClient(RoborockClient, ABC):
         self._hashed_user = mqtt_params.username
         self._mqtt_host = mqtt_params.host
         self._mqtt_port = mqtt_params.port
+        duid = device_info.device.duid
+        self._publish_topic = f"rr/m/i/{self._mqtt_user}/{self._hashed_user}/{duid}"
+        self._subscribe_topic = f"rr/m/o/{self._mqtt_user}/{self._hashed_user}/{duid}"
 
         self._mqtt_client = _Mqtt()
         self._mqtt_client.on_connect = self._mqtt_on_connect
@@ -89,7 +92,7 @@ class RoborockMqttClient(RoborockClient, ABC):
                 self._logger.debug("Failed to notify connect future, not in queue")
             return
         self._logger.info(f"Connected to mqtt {self._mqtt_host}:{self._mqtt_port}")
-        topic = f"rr/m/o/{self._mqtt_user}/{self._hashed_user}/{self.device_info.device.duid}"
+        topic = self._subscribe_topic
         (result, mid) = self._mqtt_client.subscribe(topic)
         if result != 0:
             message = f"Failed to subscribe ({mqtt.error_string(rc)})"
@@ -173,8 +176,6 @@ class RoborockMqttClient(RoborockClient, ABC):
                     raise RoborockException(err) from err
 
     def _send_msg_raw(self, msg: bytes) -> None:
-        info = self._mqtt_client.publish(
-            f"rr/m/i/{self._mqtt_user}/{self._hashed_user}/{self.device_info.device.duid}", msg
-        )
+        info = self._mqtt_client.publish(self._publish_topic, msg)
         if info.rc != mqtt.MQTT_ERR_SUCCESS:
             raise RoborockException(f"Failed to publish ({mqtt.error_string(info.rc)})")
@@ -7,7 +7,7 @@ import re
 from dataclasses import asdict, dataclass, field
 from datetime import timezone
 from enum import Enum
-from functools import cached_property
+from functools import cache, cached_property
 from typing import Any, NamedTuple, get_args, get_origin
 
 from .code_mappings import (
@@ -112,6 +112,12 @@ def decamelize_obj(d: dict | list, ignore_keys: list[str]):
     }
 
 
+@cache
+def _eval_type(type: str) -> Any:
+    """Evaluate a field annotation, caching the result since the annotations of a class never change."""
+    return eval(type)
+
+
 @dataclass
 class RoborockBase:
     _ignore_keys = []  # type: ignore
@@ -120,7 +126,7 @@ class RoborockBase:
     @staticmethod
     def convert_to_class_obj(type, value):
         try:
-            class_type = eval(type)
+            class_type = _eval_type(type)
             if get_origin(class_type) is list:
                 return_list = []
                 cls_type = get_args(class_type)[0]
@@ -145,23 +151,32 @@ class RoborockBase:
             _LOGGER.exception(err)
         raise Exception("Fail")
 
+    @classmethod
+    @cache
+    def _class_annotations(cls) -> dict[str, str]:
+        """Return the field annotations of the class and all of its bases."""
+        cls_annotations: dict[str, str] = {}
+        for base in reversed(cls.__mro__):
+            cls_annotations.update(getattr(base, "__annotations__", {}))
+        return cls_annotations
+
     @classmethod
     def from_dict(cls, data: dict[str, Any]):
         if isinstance(data, dict):
             ignore_keys = cls._ignore_keys
             data = decamelize_obj(data, ignore_keys)
-            cls_annotations: dict[str, str] = {}
-            for base in reversed(cls.__mro__):
-                cls_annotations.update(getattr(base, "__annotations__", {}))
+            cls_annotations = cls._class_annotations()
             remove_keys = []
             for key, value in data.items():
                 if key not in cls_annotations:
                     remove_keys.append(key)
                     continue
-                if value == "None" or value is None:
+                field_type: str = cls_annotations[key]
+                # An empty list for an optional field is left as the None default
+                # rather than resolving and iterating over the nested type.
+                if value == "None" or value is None or (value == [] and "None" in field_type):
                     data[key] = None
                     continue
-                field_type: str = cls_annotations[key]
                 if "|" in field_type:
                     # It's a union
                     types = field_type.split("|")
@@ -375,9 +390,9 @@ class DeviceFeatures(RoborockBase):
 def build_device_features(feature_set: str, new_feature_set: str) -> DeviceFeatures:
     new_feature_set_int = int(new_feature_set)
     feature_set_int = int(feature_set)
-    new_feature_set_divided = int(new_feature_set_int / (2**32))
+    new_feature_set_divided = new_feature_set_int >> 32
     # Convert last 8 digits of new feature set into hexadecimal number
-    converted_new_feature_set = int("0x" + new_feature_set[-8:], 16)
+    converted_new_feature_set = int(new_feature_set[-8:], 16)
     new_feature_set_mod_8: bool = len(new_feature_set) % 8 == 0
     return DeviceFeatures(
         map_carpet_add_supported=bool(1073741824 & new_feature_set_int),
@@ -9,7 +9,7 @@ import logging
 from collections.abc import Callable
 from functools import cached_property
 
-from roborock.containers import HomeDataDevice, HomeDataProduct, UserData
+from roborock.containers import DeviceFeatures, HomeDataDevice, HomeDataProduct, UserData, build_device_features
 from roborock.roborock_message import RoborockMessage
 
 from .mqtt_channel import MqttChannel
@@ -21,6 +21,10 @@ __all__ = [
     "DeviceVersion",
 ]
 
+# Devices of the same model report the same feature flags, so they can share
+# a single DeviceFeatures instance.
+_FEATURES_INTERN: dict[tuple[str, str], DeviceFeatures] = {}
+
 
 class DeviceVersion(enum.StrEnum):
     """Enum for device versions."""
@@ -82,6 +86,21 @@ class RoborockDevice:
         )
         return DeviceVersion.UNKNOWN
 
+    @cached_property
+    def device_features(self) -> DeviceFeatures | None:
+        """Return the features supported by the device.
+
+        This is None when the device does not report its feature flags.
+        """
+        feature_set = self._device_info.feature_set
+        new_feature_set = self._device_info.new_feature_set
+        if not feature_set or not new_feature_set:
+            return None
+        key = (feature_set, new_feature_set)
+        if (features := _FEATURES_INTERN.get(key)) is None:
+            features = _FEATURES_INTERN[key] = build_device_features(feature_set, new_feature_set)
+        return features
+
     async def connect(self) -> None:
         """Connect to the device using MQTT.
 
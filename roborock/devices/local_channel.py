@@ -3,23 +3,39 @@
 import asyncio
 import logging
 from collections.abc import Callable
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from json import JSONDecodeError
 
+from roborock.devices.rpc import RpcWaiterTable
 from roborock.exceptions import RoborockConnectionException, RoborockException
-from roborock.protocol import Decoder, Encoder, create_local_decoder, create_local_encoder
+from roborock.protocol import Encoder, create_local_decoder, create_local_encoder
 from roborock.roborock_message import RoborockMessage
 
 _LOGGER = logging.getLogger(__name__)
 _PORT = 58867
+_BUFFER_SIZE = 65536
 
 
 @dataclass
-class _LocalProtocol(asyncio.Protocol):
-    """Callbacks for the Roborock local client transport."""
+class _LocalProtocol(asyncio.BufferedProtocol):
+    """Callbacks for the Roborock local client transport.
 
-    messages_cb: Callable[[bytes], None]
+    The transport reads directly into a reusable buffer to avoid allocating a new
+    bytes object for every read. The decoder copies any bytes it needs to keep for
+    framing across reads, so the buffer can be reused as soon as it returns.
+    """
+
+    messages_cb: Callable[[bytes | memoryview], None]
     connection_lost_cb: Callable[[Exception | None], None]
+    _buffer: memoryview = field(default_factory=lambda: memoryview(bytearray(_BUFFER_SIZE)), init=False, repr=False)
+
+    def get_buffer(self, sizehint: int) -> memoryview:
+        """Return the buffer the transport reads incoming data into."""
+        return self._buffer
+
+    def buffer_updated(self, nbytes: int) -> None:
+        """Called when the transport has written data into the buffer."""
+        self.messages_cb(self._buffer[:nbytes])
 
     def data_received(self, data: bytes) -> None:
         """Called when data is received from the transport."""
@@ -41,14 +57,15 @@ class LocalChannel:
         self._host = host
         self._transport: asyncio.Transport | None = None
         self._protocol: _LocalProtocol | None = None
-        self._subscribers: list[Callable[[RoborockMessage], None]] = []
+        self._subscribers_list: list[Callable[[RoborockMessage], None]] = []
+        # Snapshot of the subscribers used when dispatching messages
+        self._subscribers: tuple[Callable[[RoborockMessage], None], ...] = ()
         self._is_connected = False
 
         # RPC support
-        self._waiting_queue: dict[int, asyncio.Future[RoborockMessage]] = {}
-        self._decoder: Decoder = create_local_decoder(local_key)
+        self._rpc_waiters = RpcWaiterTable()
+        self._decoder = create_local_decoder(local_key)
         self._encoder: Encoder = create_local_encoder(local_key)
-        self._queue_lock = asyncio.Lock()
 
     async def connect(self) -> None:
         """Connect to the device."""
@@ -73,14 +90,16 @@ class LocalChannel:
         self._transport = None
         self._is_connected = False
 
-    def _data_received(self, data: bytes) -> None:
+    def _data_received(self, data: bytes | memoryview) -> None:
         """Handle incoming data from the transport."""
         if not (messages := self._decoder(data)):
-            _LOGGER.warning("Failed to decode local message: %s", data)
+            # Only copy the buffer view when the warning will actually be emitted
+            if _LOGGER.isEnabledFor(logging.WARNING):
+                _LOGGER.warning("Failed to decode local message: %s", bytes(data))
             return
         for message in messages:
             _LOGGER.debug("Received message: %s", message)
-            asyncio.create_task(self._resolve_future_with_lock(message))
+            self._rpc_waiters.resolve(message)
             for callback in self._subscribers:
                 try:
                     callback(message)
@@ -95,24 +114,15 @@ class LocalChannel:
 
     async def subscribe(self, callback: Callable[[RoborockMessage], None]) -> Callable[[], None]:
         """Subscribe to all messages from the device."""
-        self._subscribers.append(callback)
+        self._subscribers_list.append(callback)
+        self._subscribers = tuple(self._subscribers_list)
 
         def unsubscribe() -> None:
-            self._subscribers.remove(callback)
+            self._subscribers_list.remove(callback)
+            self._subscribers = tuple(self._subscribers_list)
 
         return unsubscribe
 
-    async def _resolve_future_with_lock(self, message: RoborockMessage) -> None:
-        """Resolve waiting future with proper locking."""
-        if (request_id := message.get_request_id()) is None:
-            _LOGGER.debug("Received message with no request_id")
-            return
-        async with self._queue_lock:
-            if (future := self._waiting_queue.pop(request_id, None)) is not None:
-                future.set_result(message)
-            else:
-                _LOGGER.debug("Received message with no waiting handler: request_id=%s", request_id)
-
     async def send_command(self, message: RoborockMessage, timeout: float = 10.0) -> RoborockMessage:
         """Send a command message and wait for the response message."""
         if not self._transport or not self._is_connected:
@@ -125,22 +135,16 @@ class LocalChannel:
             _LOGGER.exception("Error getting request_id from message: %s", err)
             raise RoborockException(f"Invalid message format, Message must have a request_id: {err}") from err
 
-        future: asyncio.Future[RoborockMessage] = asyncio.Future()
-        async with self._queue_lock:
-            if request_id in self._waiting_queue:
-                raise RoborockException(f"Request ID {request_id} already pending, cannot send command")
-            self._waiting_queue[request_id] = future
+        future = self._rpc_waiters.register(request_id)
 
         try:
             encoded_msg = self._encoder(message)
             self._transport.write(encoded_msg)
             return await asyncio.wait_for(future, timeout=timeout)
         except asyncio.TimeoutError as ex:
-            async with self._queue_lock:
-                self._waiting_queue.pop(request_id, None)
+            self._rpc_waiters.cancel(request_id)
             raise RoborockException(f"Command timed out after {timeout}s") from ex
         except Exception:
             logging.exception("Uncaught error sending command")
-            async with self._queue_lock:
-                self._waiting_queue.pop(request_id, None)
+            self._rpc_waiters.cancel(request_id)
             raise
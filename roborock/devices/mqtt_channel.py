@@ -1,11 +1,13 @@
 """Modules for communicating with specific Roborock devices over MQTT."""
 
 import asyncio
+import functools
 import logging
 from collections.abc import Callable
 from json import JSONDecodeError
 
 from roborock.containers import RRiot
+from roborock.devices.rpc import RpcWaiterTable
 from roborock.exceptions import RoborockException
 from roborock.mqtt.session import MqttParams, MqttSession
 from roborock.protocol import create_mqtt_decoder, create_mqtt_encoder
@@ -13,6 +15,10 @@ from roborock.roborock_message import RoborockMessage
 
 _LOGGER = logging.getLogger(__name__)
 
+# Payloads larger than this are decoded in an executor so that decrypting and
+# parsing them does not block the event loop.
+_EXECUTOR_DECODE_THRESHOLD = 4096
+
 
 class MqttChannel:
     """Simple RPC-style channel for communicating with a device over MQTT.
@@ -27,22 +33,15 @@ class MqttChannel:
         self._local_key = local_key
         self._rriot = rriot
         self._mqtt_params = mqtt_params
+        # Topic to send commands to the device
+        self._publish_topic = f"rr/m/i/{rriot.u}/{mqtt_params.username}/{duid}"
+        # Topic to receive responses from the device
+        self._subscribe_topic = f"rr/m/o/{rriot.u}/{mqtt_params.username}/{duid}"
 
         # RPC support
-        self._waiting_queue: dict[int, asyncio.Future[RoborockMessage]] = {}
+        self._rpc_waiters = RpcWaiterTable()
         self._decoder = create_mqtt_decoder(local_key)
         self._encoder = create_mqtt_encoder(local_key)
-        self._queue_lock = asyncio.Lock()
-
-    @property
-    def _publish_topic(self) -> str:
-        """Topic to send commands to the device."""
-        return f"rr/m/i/{self._rriot.u}/{self._mqtt_params.username}/{self._duid}"
-
-    @property
-    def _subscribe_topic(self) -> str:
-        """Topic to receive responses from the device."""
-        return f"rr/m/o/{self._rriot.u}/{self._mqtt_params.username}/{self._duid}"
 
     async def subscribe(self, callback: Callable[[RoborockMessage], None]) -> Callable[[], None]:
         """Subscribe to the device's response topic.
@@ -55,30 +54,34 @@ class MqttChannel:
         Returns a callable that can be used to unsubscribe from the topic.
         """
 
-        def message_handler(payload: bytes) -> None:
-            if not (messages := self._decoder(payload)):
+        def handle_messages(payload: bytes, messages: list[RoborockMessage]) -> None:
+            if not messages:
                 _LOGGER.warning("Failed to decode MQTT message: %s", payload)
                 return
             for message in messages:
                 _LOGGER.debug("Received message: %s", message)
-                asyncio.create_task(self._resolve_future_with_lock(message))
+                self._rpc_waiters.resolve(message)
                 try:
                     callback(message)
                 except Exception as e:
                     _LOGGER.exception("Uncaught error in message handler callback: %s", e)
 
-        return await self._mqtt_session.subscribe(self._subscribe_topic, message_handler)
+        def decoded(payload: bytes, future: asyncio.Future[list[RoborockMessage]]) -> None:
+            if future.cancelled():
+                return
+            if (err := future.exception()) is not None:
+                _LOGGER.warning("Failed to decode MQTT message: %s", err)
+                return
+            handle_messages(payload, future.result())
 
-    async def _resolve_future_with_lock(self, message: RoborockMessage) -> None:
-        """Resolve waiting future with proper locking."""
-        if (request_id := message.get_request_id()) is None:
-            _LOGGER.debug("Received message with no request_id")
-            return
-        async with self._queue_lock:
-            if (future := self._waiting_queue.pop(request_id, None)) is not None:
-                future.set_result(message)
-            else:
-                _LOGGER.debug("Received message with no waiting handler: request_id=%s", request_id)
+        def message_handler(payload: bytes) -> None:
+            if len(payload) > _EXECUTOR_DECODE_THRESHOLD:
+                future = asyncio.get_running_loop().run_in_executor(None, self._decoder, payload)
+                future.add_done_callback(functools.partial(decoded, payload))
+                return
+            handle_messages(payload, self._decoder(payload))
+
+        return await self._mqtt_session.subscribe(self._subscribe_topic, message_handler)
 
     async def send_command(self, message: RoborockMessage, timeout: float = 10.0) -> RoborockMessage:
         """Send a command message and wait for the response message.
@@ -92,11 +95,7 @@ class MqttChannel:
             _LOGGER.exception("Error getting request_id from message: %s", err)
             raise RoborockException(f"Invalid message format, Message must have a request_id: {err}") from err
 
-        future: asyncio.Future[RoborockMessage] = asyncio.Future()
-        async with self._queue_lock:
-            if request_id in self._waiting_queue:
-                raise RoborockException(f"Request ID {request_id} already pending, cannot send command")
-            self._waiting_queue[request_id] = future
+        future = self._rpc_waiters.register(request_id)
 
         try:
             encoded_msg = self._encoder(message)
@@ -105,11 +104,9 @@ class MqttChannel:
             return await asyncio.wait_for(future, timeout=timeout)
 
         except asyncio.TimeoutError as ex:
-            async with self._queue_lock:
-                self._waiting_queue.pop(request_id, None)
+            self._rpc_waiters.cancel(request_id)
             raise RoborockException(f"Command timed out after {timeout}s") from ex
         except Exception:
             logging.exception("Uncaught error sending command")
-            async with self._queue_lock:
-                self._waiting_queue.pop(request_id, None)
+            self._rpc_waiters.cancel(request_id)
             raise
@@ -0,0 +1,68 @@
+"""Module for correlating RPC responses with the requests waiting on them."""
+
+import asyncio
+import functools
+import logging
+
+from roborock.exceptions import RoborockException
+from roborock.roborock_message import RoborockMessage
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class RpcWaiterTable:
+    """Table of futures waiting on RPC responses, keyed by request id.
+
+    The table is only accessed from the event loop so no locking is needed.
+    Futures remove themselves from the table once they are done, whether they
+    were resolved, cancelled or timed out.
+    """
+
+    def __init__(self) -> None:
+        self._waiters: dict[int, asyncio.Future[RoborockMessage]] = {}
+
+    def __len__(self) -> int:
+        return len(self._waiters)
+
+    def get(self, request_id: int) -> asyncio.Future[RoborockMessage] | None:
+        """Return the future waiting on the request, if any."""
+        return self._waiters.get(request_id)
+
+    def register(self, request_id: int) -> asyncio.Future[RoborockMessage]:
+        """Create a future waiting on the response to the request."""
+        future: asyncio.Future[RoborockMessage] = asyncio.Future()
+        # Check for a pending request and insert with a single lookup
+        if self._waiters.setdefault(request_id, future) is not future:
+            raise RoborockException(f"Request ID {request_id} already pending, cannot send command")
+        future.add_done_callback(functools.partial(self._remove, request_id))
+        return future
+
+    def resolve(self, message: RoborockMessage) -> None:
+        """Resolve the future waiting on a response message."""
+        try:
+            request_id = message.get_request_id()
+        except (ValueError, AttributeError) as err:
+            _LOGGER.debug("Received message without a parsable request_id: %s", err)
+            return
+        if request_id is None:
+            _LOGGER.debug("Received message with no request_id")
+            return
+        if (future := self._waiters.pop(request_id, None)) is not None:
+            if not future.done():
+                future.set_result(message)
+        else:
+            _LOGGER.debug("Received message with no waiting handler: request_id=%s", request_id)
+
+    def cancel(self, request_id: int) -> None:
+        """Remove and cancel the future waiting on the request, if any.
+
+        The entry is removed immediately so the request id may be reused right
+        away, rather than once the done callback runs on the next loop iteration.
+        """
+        if (future := self._waiters.pop(request_id, None)) is not None:
+            future.cancel()
+
+    def _remove(self, request_id: int, future: asyncio.Future[RoborockMessage]) -> None:
+        """Remove a completed, cancelled or timed out future from the table."""
+        if self._waiters.get(request_id) is future:
+            del self._waiters[request_id]
@@ -10,11 +10,14 @@ receiving messages from the vacuum cleaner.
 
 import asyncio
 import datetime
+import functools
 import logging
 from collections.abc import Callable
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
+from typing import Any
 
 import aiomqtt
+import paho.mqtt.client as mqtt
 from aiomqtt import MqttError, TLSParameters
 
 from .session import MqttParams, MqttSession, MqttSessionException
@@ -24,6 +27,9 @@ _MQTT_LOGGER = logging.getLogger(f"{__name__}.aiomqtt")
 
 KEEPALIVE = 60
 
+# Maximum number of queued messages sent in a single publish batch
+MAX_PUBLISH_BATCH = 32
+
 # Exponential backoff parameters
 MIN_BACKOFF_INTERVAL = datetime.timedelta(seconds=10)
 MAX_BACKOFF_INTERVAL = datetime.timedelta(minutes=30)
@@ -43,16 +49,26 @@ class RoborockMqttSession(MqttSession):
     is backoff to avoid spamming the broker with connection attempts. The client
     will automatically re-establish any subscriptions when the connection is
     re-established.
+
+    Published messages are queued and sent by a background task, which publishes
+    all messages waiting in the queue together to reduce per-message overhead.
+    The queue only exists while connected, so messages are never held over to
+    a later connection.
     """
 
     def __init__(self, params: MqttParams):
         self._params = params
         self._background_task: asyncio.Task[None] | None = None
+        self._start_future: asyncio.Future[None] | None = None
         self._healthy = False
         self._backoff = MIN_BACKOFF_INTERVAL
         self._client: aiomqtt.Client | None = None
         self._client_lock = asyncio.Lock()
         self._listeners: dict[str, list[Callable[[bytes], None]]] = {}
+        # Snapshot of the listeners for each topic used when dispatching messages,
+        # cleared whenever the listeners change.
+        self._topic_listeners: dict[str, tuple[Callable[[bytes], None], ...]] = {}
+        self._publish_queue: asyncio.Queue[tuple[str, bytes, asyncio.Future[None]]] | None = None
 
     @property
     def connected(self) -> bool:
@@ -66,12 +82,22 @@ class RoborockMqttSession(MqttSession):
         failures are raised immediately. This is to allow the caller to
         handle the failure and retry if desired itself. Once connected,
         the session will retry connecting in the background.
+
+        Concurrent callers share the same connection attempt. Calling this on a
+        session that has already connected does not reconnect and returns
+        immediately, even while the session is reconnecting in the background;
+        see `connected` for the current connection state.
         """
-        start_future: asyncio.Future[None] = asyncio.Future()
-        loop = asyncio.get_event_loop()
-        self._background_task = loop.create_task(self._run_task(start_future))
+        if self._background_task is None or self._background_task.done() or self._start_future is None:
+            self._start_future = asyncio.Future()
+            loop = asyncio.get_event_loop()
+            self._background_task = loop.create_task(self._run_task(self._start_future))
+        elif self._start_future.done():
+            _LOGGER.debug("MQTT session already started, connected=%s", self._healthy)
+            return
         try:
-            await start_future
+            # Shield the shared future so a cancelled caller does not cancel it for others
+            await asyncio.shield(self._start_future)
         except MqttError as err:
             raise MqttSessionException(f"Error starting MQTT session: {err}") from err
         except Exception as err:
@@ -106,7 +132,18 @@ class RoborockMqttSession(MqttSession):
                         start_future.set_result(None)
                         start_future = None
 
-                    await self._process_message_loop(client)
+                    publish_queue: asyncio.Queue[tuple[str, bytes, asyncio.Future[None]]] = asyncio.Queue()
+                    self._publish_queue = publish_queue
+                    publish_task = asyncio.create_task(self._publish_loop(client, publish_queue))
+                    try:
+                        await self._process_message_loop(client)
+                    finally:
+                        # Stop accepting messages before the publish task is stopped
+                        self._publish_queue = None
+                        publish_task.cancel()
+                        with suppress(asyncio.CancelledError):
+                            await publish_task
+                        _fail_queued_messages(publish_queue)
 
             except MqttError as err:
                 if start_future:
@@ -156,14 +193,19 @@ class RoborockMqttSession(MqttSession):
                 logger=_MQTT_LOGGER,
             ) as client:
                 _LOGGER.debug("Connected to MQTT broker")
+                # This replaces the aiomqtt message callback on the private paho
+                # client, so messages are never put on the aiomqtt message queue.
+                # It relies on the private aiomqtt.Client._client attribute (and
+                # _disconnected below), so it is tied to the aiomqtt 2.x versions
+                # supported in pyproject.toml.
+                client._client.on_message = self._on_message
                 # Re-establish any existing subscriptions
                 async with self._client_lock:
                     self._client = client
-                    for topic in self._listeners:
-                        _LOGGER.debug("Re-establishing subscription to topic %s", topic)
-                        # TODO: If this fails it will break the whole connection. Make
-                        # this retry again in the background with backoff.
-                        await client.subscribe(topic)
+                    _LOGGER.debug("Re-establishing subscriptions to topics %s", list(self._listeners))
+                    # TODO: If this fails it will break the whole connection. Make
+                    # this retry again in the background with backoff.
+                    await asyncio.gather(*(client.subscribe(topic) for topic in self._listeners))
 
                 yield client
         finally:
@@ -172,15 +214,69 @@ class RoborockMqttSession(MqttSession):
 
     async def _process_message_loop(self, client: aiomqtt.Client) -> None:
         _LOGGER.debug("Processing MQTT messages")
-        async for message in client.messages:
-            _LOGGER.debug("Received message: %s", message)
-            for listener in self._listeners.get(message.topic.value, []):
-                try:
-                    listener(message.payload)
-                except asyncio.CancelledError:
-                    raise
-                except Exception as e:
-                    _LOGGER.error("Uncaught exception in subscriber callback: %s", e)
+        # Messages are dispatched by _on_message, so this only waits for the
+        # client to disconnect. An unexpected disconnect raises MqttError. The
+        # future is shielded since aiomqtt inspects it again when exiting.
+        await asyncio.shield(client._disconnected)
+        raise MqttError("Disconnected from MQTT broker")
+
+    def _on_message(self, client: mqtt.Client, userdata: Any, message: mqtt.MQTTMessage) -> None:
+        """Dispatch a message received by the paho MQTT client.
+
+        The aiomqtt client runs the paho client on the event loop, so this is
+        called from the event loop. This skips the aiomqtt message queue, which
+        would add a task and a queue hop for every message received.
+        """
+        self._dispatch(message.topic, message.payload)
+
+    def _dispatch(self, topic: str, payload: Any) -> None:
+        """Invoke the listeners subscribed to the topic."""
+        _LOGGER.debug("Received message on topic %s: %s", topic, payload)
+        listeners = self._topic_listeners.get(topic)
+        if listeners is None:
+            listeners = tuple(self._listeners.get(topic, ()))
+            self._topic_listeners[topic] = listeners
+        if not listeners:
+            return
+        for listener in listeners:
+            try:
+                listener(payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                _LOGGER.error("Uncaught exception in subscriber callback: %s", e)
+
+    async def _publish_loop(
+        self, client: aiomqtt.Client, queue: asyncio.Queue[tuple[str, bytes, asyncio.Future[None]]]
+    ) -> None:
+        """Publish queued messages in batches until the connection is closed."""
+        batch: list[tuple[str, bytes, asyncio.Future[None]]] = []
+        try:
+            while True:
+                batch = [await queue.get()]
+                while len(batch) < MAX_PUBLISH_BATCH and not queue.empty():
+                    batch.append(queue.get_nowait())
+                # Skip messages whose caller has already given up waiting
+                batch = [item for item in batch if not item[2].done()]
+                results = await asyncio.gather(
+                    *(client.publish(topic, message) for topic, message, _ in batch),
+                    return_exceptions=True,
+                )
+                for (_, _, future), result in zip(batch, results):
+                    if future.done():
+                        continue
+                    if isinstance(result, MqttError):
+                        future.set_exception(MqttSessionException(f"Error publishing message: {result}"))
+                    elif isinstance(result, BaseException):
+                        future.set_exception(result)
+                    else:
+                        future.set_result(None)
+                batch = []
+        finally:
+            # Fail any messages in flight when the connection is closed
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(MqttSessionException("Could not publish message, MQTT client disconnected"))
 
     async def subscribe(self, topic: str, callback: Callable[[bytes], None]) -> Callable[[], None]:
         """Subscribe to messages on the specified topic and invoke the callback for new messages.
@@ -194,6 +290,7 @@ class RoborockMqttSession(MqttSession):
         if topic not in self._listeners:
             self._listeners[topic] = []
         self._listeners[topic].append(callback)
+        self._topic_listeners.clear()
 
         async with self._client_lock:
             if self._client:
@@ -205,20 +302,37 @@ class RoborockMqttSession(MqttSession):
             else:
                 _LOGGER.debug("Client not connected, will establish subscription later")
 
-        return lambda: self._listeners[topic].remove(callback)
+        return functools.partial(self._unsubscribe, topic, callback)
+
+    def _unsubscribe(self, topic: str, callback: Callable[[bytes], None]) -> None:
+        """Remove a listener for the topic."""
+        self._listeners[topic].remove(callback)
+        self._topic_listeners.clear()
 
     async def publish(self, topic: str, message: bytes) -> None:
-        """Publish a message on the topic."""
+        """Publish a message on the topic.
+
+        The message is queued and sent by the background publish task. This waits
+        until the message has been sent, up to the session timeout.
+        """
         _LOGGER.debug("Sending message to topic %s: %s", topic, message)
-        client: aiomqtt.Client
-        async with self._client_lock:
-            if self._client is None:
-                raise MqttSessionException("Could not publish message, MQTT client not connected")
-            client = self._client
+        # The queue only exists while the publish task for a connection is running
+        if (queue := self._publish_queue) is None:
+            raise MqttSessionException("Could not publish message, MQTT client not connected")
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        queue.put_nowait((topic, message, future))
         try:
-            await client.publish(topic, message)
-        except MqttError as err:
-            raise MqttSessionException(f"Error publishing message: {err}") from err
+            await asyncio.wait_for(future, timeout=self._params.timeout)
+        except asyncio.TimeoutError as err:
+            raise MqttSessionException(f"Timeout publishing message after {self._params.timeout}s") from err
+
+
+def _fail_queued_messages(queue: asyncio.Queue[tuple[str, bytes, asyncio.Future[None]]]) -> None:
+    """Fail any messages that will not be sent on the closed connection."""
+    while not queue.empty():
+        _, _, future = queue.get_nowait()
+        if not future.done():
+            future.set_exception(MqttSessionException("Could not publish message, MQTT client disconnected"))
 
 
 async def create_mqtt_session(params: MqttParams) -> MqttSession:
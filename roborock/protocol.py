@@ -8,6 +8,7 @@ import json
 import logging
 from asyncio import BaseTransport, Lock
 from collections.abc import Callable
+from functools import lru_cache
 from urllib.parse import urlparse
 
 from construct import (  # type: ignore
@@ -45,9 +46,7 @@ SOCK_DISCOVERY = 2
 
 
 def md5hex(message: str) -> str:
-    md5 = hashlib.md5()
-    md5.update(message.encode())
-    return md5.hexdigest()
+    return hashlib.md5(message.encode(), usedforsecurity=False).hexdigest()
 
 
 class RoborockProtocol(asyncio.DatagramProtocol):
@@ -107,9 +106,7 @@ class Utils:
     @staticmethod
     def md5(data: bytes) -> bytes:
         """Calculates a md5 hashsum for the given bytes object."""
-        checksum = hashlib.md5()  # nosec
-        checksum.update(data)
-        return checksum.digest()
+        return hashlib.md5(data, usedforsecurity=False).digest()
 
     @staticmethod
     def encrypt_ecb(plaintext: bytes, token: bytes) -> bytes:
@@ -314,7 +311,7 @@ class _Parser:
         self.con = con
         self.required_local_key = required_local_key
 
-    def parse(self, data: bytes, local_key: str | None = None) -> tuple[list[RoborockMessage], bytes]:
+    def parse(self, data: bytes | bytearray, local_key: str | None = None) -> tuple[list[RoborockMessage], bytes]:
         if self.required_local_key and local_key is None:
             raise RoborockException("Local key is required")
         parsed = self.con.parse(data, local_key=local_key)
@@ -339,31 +336,40 @@ class _Parser:
     ) -> bytes:
         if isinstance(roborock_messages, RoborockMessage):
             roborock_messages = [roborock_messages]
-        messages = []
-        for roborock_message in roborock_messages:
-            messages.append(
-                {
-                    "message": {
-                        "value": {
-                            "version": roborock_message.version,
-                            "seq": roborock_message.seq,
-                            "random": roborock_message.random,
-                            "timestamp": roborock_message.timestamp,
-                            "protocol": roborock_message.protocol,
-                            "payload": roborock_message.payload,
-                        }
-                    },
-                }
-            )
-        return self.con.build(
-            {"messages": [message for message in messages], "remaining": b""}, local_key=local_key, prefixed=prefixed
-        )
+        messages = [
+            {
+                "message": {
+                    "value": {
+                        "version": roborock_message.version,
+                        "seq": roborock_message.seq,
+                        "random": roborock_message.random,
+                        "timestamp": roborock_message.timestamp,
+                        "protocol": roborock_message.protocol,
+                        "payload": roborock_message.payload,
+                    }
+                },
+            }
+            for roborock_message in roborock_messages
+        ]
+        return self.con.build({"messages": messages, "remaining": b""}, local_key=local_key, prefixed=prefixed)
 
 
 MessageParser: _Parser = _Parser(_Messages, True)
 BroadcastParser: _Parser = _Parser(_BroadcastMessage, False)
 
 
+@lru_cache(maxsize=64)
+def _hashed_mqtt_credentials(u: str, s: str, k: str) -> tuple[str, str]:
+    """Return the hashed MQTT username and password for the user."""
+    return md5hex(f"{u}:{k}")[2:10], md5hex(f"{s}:{k}")[16:]
+
+
+@lru_cache(maxsize=64)
+def create_mqtt_endpoint(k: str) -> str:
+    """Return the MQTT endpoint sent in secure requests for the user."""
+    return binascii.b2a_base64(Utils.md5(k.encode())[8:14], newline=False).decode()
+
+
 def create_mqtt_params(rriot: RRiot) -> MqttParams:
     """Return the MQTT parameters for this user."""
     url = urlparse(rriot.r.m)
@@ -371,8 +377,7 @@ def create_mqtt_params(rriot: RRiot) -> MqttParams:
         raise RoborockException(f"Url parsing '{rriot.r.m}' returned an invalid hostname")
     if not url.port:
         raise RoborockException(f"Url parsing '{rriot.r.m}' returned an invalid port")
-    hashed_user = md5hex(rriot.u + ":" + rriot.k)[2:10]
-    hashed_password = md5hex(rriot.s + ":" + rriot.k)[16:]
+    hashed_user, hashed_password = _hashed_mqtt_credentials(rriot.u, rriot.s, rriot.k)
     return MqttParams(
         host=str(url.hostname),
         port=url.port,
@@ -407,19 +412,24 @@ def create_mqtt_encoder(local_key: str) -> Encoder:
     return encode
 
 
-def create_local_decoder(local_key: str) -> Decoder:
-    """Create a decoder for local API messages."""
+def create_local_decoder(local_key: str) -> Callable[[bytes | memoryview], list[RoborockMessage]]:
+    """Create a decoder for local API messages.
+
+    The decoder appends the data it is given to its own buffer, so it may be
+    called with a view of a buffer that is reused once the decoder returns.
+    """
 
     # This buffer is used to accumulate bytes until a complete message can be parsed.
-    # It is defined outside the decode function to maintain state across calls.
-    buffer: bytes = b""
+    # It is defined outside the decode function to maintain state across calls, and
+    # is extended in place so no intermediate bytes object is created per call.
+    buffer = bytearray()
 
-    def decode(bytes: bytes) -> list[RoborockMessage]:
+    def decode(data: bytes | memoryview) -> list[RoborockMessage]:
         """Parse the given data into Roborock messages."""
-        nonlocal buffer
-        buffer += bytes
+        buffer.extend(data)
         parsed_messages, remaining = MessageParser.parse(buffer, local_key=local_key)
-        buffer = remaining
+        # Drop the parsed bytes, keeping any partial message for the next call
+        del buffer[: len(buffer) - len(remaining)]
         return parsed_messages
 
     return decode
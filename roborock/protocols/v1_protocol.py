@@ -2,22 +2,22 @@
 
 from __future__ import annotations
 
-import json
-import math
 import time
 from collections.abc import Callable
 from dataclasses import dataclass, field
+from functools import lru_cache
+from json.encoder import encode_basestring_ascii
 from typing import Any
 
 from roborock.roborock_message import MessageRetry, RoborockMessage, RoborockMessageProtocol
 from roborock.roborock_typing import RoborockCommand
-from roborock.util import get_next_int
+from roborock.util import get_next_int, json_dumps
 
 CommandType = RoborockCommand | str
 ParamsType = list | dict | int | None
 
 
-@dataclass(frozen=True, kw_only=True)
+@dataclass(frozen=True, kw_only=True, slots=True)
 class SecurityData:
     """Security data included in the request for some V1 commands."""
 
@@ -26,44 +26,64 @@ class SecurityData:
 
     def to_dict(self) -> dict[str, Any]:
         """Convert security data to a dictionary for sending in the payload."""
-        return {"security": {"endpoint": self.endpoint, "nonce": self.nonce.hex().lower()}}
+        return {"security": {"endpoint": self.endpoint, "nonce": self.nonce.hex()}}
 
 
-@dataclass
+@dataclass(slots=True)
 class RequestMessage:
     """Data structure for v1 RoborockMessage payloads."""
 
     method: RoborockCommand | str
     params: ParamsType
-    timestamp: int = field(default_factory=lambda: math.floor(time.time()))
+    timestamp: int = field(default_factory=lambda: int(time.time()))
     request_id: int = field(default_factory=lambda: get_next_int(10000, 32767))
 
     def as_payload(self, security_data: SecurityData | None) -> bytes:
         """Convert the request arguments to a dictionary."""
-        inner = {
+        return self._encode_payload(security_data.to_dict()["security"] if security_data else None)
+
+    def _encode_payload(self, security: dict[str, Any] | None) -> bytes:
+        """Encode the request with an already built security dictionary."""
+        if not self.params:
+            template = _payload_template(self.method, tuple(security.items()) if security is not None else None)
+            return template % (self.request_id, self.timestamp)
+        inner: dict[str, Any] = {
             "id": self.request_id,
             "method": self.method,
             "params": self.params or [],
-            **(security_data.to_dict() if security_data else {}),
         }
-        return bytes(
-            json.dumps(
-                {
-                    "dps": {"101": json.dumps(inner, separators=(",", ":"))},
-                    "t": self.timestamp,
-                },
-                separators=(",", ":"),
-            ).encode()
-        )
+        if security is not None:
+            inner["security"] = security
+        # The inner request is embedded in the envelope as a JSON string, so it is
+        # serialized once and escaped into place rather than serialized twice.
+        inner_json = encode_basestring_ascii(json_dumps(inner).decode())
+        return b'{"dps":{"101":%s},"t":%d}' % (inner_json.encode(), self.timestamp)
+
+
+@lru_cache(maxsize=256)
+def _payload_template(method: str, security: tuple[tuple[str, Any], ...] | None) -> bytes:
+    """Return the payload for a request without params, with placeholders for its id and timestamp.
+
+    Requests without params, such as status polling, only differ by their id and
+    timestamp, so the JSON for each method is only serialized once.
+    """
+    inner: dict[str, Any] = {"id": 0, "method": method, "params": []}
+    if security is not None:
+        inner["security"] = dict(security)
+    # Escape any literal % so only the id and timestamp placeholders are substituted
+    inner_json = json_dumps(inner).decode().replace("%", "%%").replace('{"id":0,', '{"id":%d,', 1)
+    return b'{"dps":{"101":%s},"t":%%d}' % encode_basestring_ascii(inner_json).encode()
 
 
 def create_mqtt_payload_encoder(security_data: SecurityData) -> Callable[[CommandType, ParamsType], RoborockMessage]:
     """Create a payload encoder for V1 commands over MQTT."""
+    # The security data does not change for the life of the encoder
+    security = security_data.to_dict()["security"]
 
     def _get_payload(method: CommandType, params: ParamsType) -> RoborockMessage:
         """Build the payload for a V1 command."""
         request = RequestMessage(method=method, params=params)
-        payload = request.as_payload(security_data)  # always secure
+        payload = request._encode_payload(security)  # always secure
         return RoborockMessage(
             timestamp=request.timestamp,
             protocol=RoborockMessageProtocol.RPC_REQUEST,
@@ -1,7 +1,6 @@
 from __future__ import annotations
 
 import json
-import math
 import time
 from dataclasses import dataclass, field
 
@@ -152,17 +151,27 @@ class MessageRetry:
     retry_id: int
 
 
-@dataclass
+@dataclass(slots=True)
 class RoborockMessage:
     protocol: RoborockMessageProtocol
     payload: bytes | None = None
     seq: int = field(default_factory=lambda: get_next_int(100000, 999999))
     version: bytes = b"1.0"
     random: int = field(default_factory=lambda: get_next_int(10000, 99999))
-    timestamp: int = field(default_factory=lambda: math.floor(time.time()))
+    timestamp: int = field(default_factory=lambda: int(time.time()))
     message_retry: MessageRetry | None = None
+    # Payload and request id parsed from it by the last get_request_id call
+    _request_id_cache: tuple[bytes, int | None] | None = field(default=None, init=False, repr=False, compare=False)
 
     def get_request_id(self) -> int | None:
+        if (cache := self._request_id_cache) is not None and cache[0] is self.payload:
+            return cache[1]
+        request_id = self._parse_request_id()
+        if self.payload:
+            self._request_id_cache = (self.payload, request_id)
+        return request_id
+
+    def _parse_request_id(self) -> int | None:
         if self.payload:
             payload = json.loads(self.payload.decode())
             for data_point_number, data_point in payload.get("dps").items():
@@ -3,13 +3,20 @@ from __future__ import annotations
 import asyncio
 import datetime
 import functools
+import json
 import logging
+import re
 from asyncio import AbstractEventLoop, TimerHandle
 from collections.abc import Callable, Coroutine, MutableMapping
 from typing import Any, TypeVar
 
 from roborock import RoborockException
 
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore[assignment]
+
 T = TypeVar("T")
 DEFAULT_TIME_ZONE: datetime.tzinfo | None = datetime.datetime.now().astimezone().tzinfo
 
@@ -120,3 +127,39 @@ def get_next_int(min_val: int, max_val: int):
         counter_map[(min_val, max_val)] = min_val
     counter_map[(min_val, max_val)] += 1
     return counter_map[(min_val, max_val)] % max_val + min_val
+
+
+# Bytes the standard library escapes (with ensure_ascii) that orjson leaves as is
+_UNESCAPED_BYTES = re.compile(rb"[\x7f-\xff]")
+_UNESCAPED_CHARS = re.compile("[\x7f-\U0010ffff]")
+
+
+def _escape_char(match: re.Match[str]) -> str:
+    """Escape a character as the standard library does, using surrogate pairs above the BMP."""
+    code = ord(match.group())
+    if code > 0xFFFF:
+        code -= 0x10000
+        return f"\\u{0xD800 | (code >> 10):04x}\\u{0xDC00 | (code & 0x3FF):04x}"
+    return f"\\u{code:04x}"
+
+
+def json_dumps(obj: Any) -> bytes:
+    """Serialize the object to compact JSON, using orjson when it is installed.
+
+    Non-ASCII text is escaped the same way as the standard library so the bytes
+    sent to the device do not depend on whether orjson is installed.
+    """
+    if orjson is None:
+        return json.dumps(obj, separators=(",", ":")).encode()
+    data = orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    if _UNESCAPED_BYTES.search(data) is None:
+        return data
+    # These characters only appear inside JSON strings, so they can be escaped in place
+    return _UNESCAPED_CHARS.sub(_escape_char, data.decode()).encode()
+
+
+def json_loads(data: bytes | str) -> Any:
+    """Deserialize a JSON document, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
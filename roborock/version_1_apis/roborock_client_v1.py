@@ -1,6 +1,5 @@
 import asyncio
 import dataclasses
-import json
 import struct
 import time
 from abc import ABC, abstractmethod
@@ -53,14 +52,16 @@ from roborock.roborock_message import (
     RoborockMessage,
     RoborockMessageProtocol,
 )
-from roborock.util import RepeatableTask, unpack_list
+from roborock.util import RepeatableTask, json_loads, unpack_list
 
-CUSTOM_COMMANDS = {RoborockCommand.GET_MAP_CALIBRATION}
+CUSTOM_COMMANDS = frozenset({RoborockCommand.GET_MAP_CALIBRATION})
 
-COMMANDS_SECURED = {
-    RoborockCommand.GET_MAP_V1,
-    RoborockCommand.GET_MULTI_MAP,
-}
+COMMANDS_SECURED = frozenset(
+    {
+        RoborockCommand.GET_MAP_V1,
+        RoborockCommand.GET_MULTI_MAP,
+    }
+)
 
 CLOUD_REQUIRED = COMMANDS_SECURED.union(CUSTOM_COMMANDS)
 
@@ -280,12 +281,19 @@ class RoborockClientV1(RoborockClient, ABC):
                 self.get_consumable(),
             ]
         )  # type: Status, CleanSummary, Consumable # type: ignore
-        last_clean_record = None
-        if clean_summary and clean_summary.records and len(clean_summary.records) > 0:
-            last_clean_record = await self.get_clean_record(clean_summary.records[0])
-        dock_summary = None
-        if status and status.dock_type is not None and status.dock_type != RoborockDockTypeCode.no_dock:
-            dock_summary = await self.get_dock_summary(status.dock_type)
+
+        async def get_last_clean_record() -> CleanRecord | None:
+            if clean_summary and clean_summary.records and len(clean_summary.records) > 0:
+                return await self.get_clean_record(clean_summary.records[0])
+            return None
+
+        async def get_dock_summary() -> DockSummary | None:
+            if status and status.dock_type is not None and status.dock_type != RoborockDockTypeCode.no_dock:
+                return await self.get_dock_summary(status.dock_type)
+            return None
+
+        # These depend on the results above but not on each other, so request them concurrently
+        last_clean_record, dock_summary = await asyncio.gather(get_last_clean_record(), get_dock_summary())
         if any([status, clean_summary, consumable]):
             return DeviceProp(
                 status,
@@ -347,6 +355,28 @@ class RoborockClientV1(RoborockClient, ABC):
     ) -> Any:
         """Send a command to the Roborock device."""
 
+    def _handle_rpc_response(self, protocol: RoborockMessageProtocol, data_point: str) -> None:
+        """Resolve the request waiting on the RPC response data point."""
+        data_point_response = json_loads(data_point)
+        request_id = data_point_response.get("id")
+        queue = self._waiting_queue.get(request_id)
+        if queue and queue.protocol == protocol:
+            error = data_point_response.get("error")
+            if error:
+                queue.set_exception(
+                    VacuumError(
+                        error.get("code"),
+                        error.get("message"),
+                    ),
+                )
+            else:
+                result = data_point_response.get("result")
+                if isinstance(result, list) and len(result) == 1:
+                    result = result[0]
+                queue.set_result(result)
+        else:
+            self._logger.debug("Received response for unknown request id %s", request_id)
+
     def on_message_received(self, messages: list[RoborockMessage]) -> None:
         try:
             self._last_device_msg_in = time.monotonic()
@@ -356,78 +386,63 @@ class RoborockClientV1(RoborockClient, ABC):
                     RoborockMessageProtocol.RPC_RESPONSE,
                     RoborockMessageProtocol.GENERAL_REQUEST,
                 ]:
-                    payload = json.loads(data.payload.decode())
-                    for data_point_number, data_point in payload.get("dps").items():
-                        if data_point_number == "102":
-                            data_point_response = json.loads(data_point)
-                            request_id = data_point_response.get("id")
-                            queue = self._waiting_queue.get(request_id)
-                            if queue and queue.protocol == protocol:
-                                error = data_point_response.get("error")
-                                if error:
-                                    queue.set_exception(
-                                        VacuumError(
-                                            error.get("code"),
-                                            error.get("message"),
-                                        ),
+                    dps = json_loads(data.payload).get("dps")
+                    # Responses to requests are keyed by the fixed 102 data point, so handle
+                    # them directly and only iterate over any remaining data points.
+                    if (rpc_response := dps.pop("102", None)) is not None:
+                        self._handle_rpc_response(protocol, rpc_response)
+                    for data_point_number, data_point in dps.items():
+                        try:
+                            data_protocol = RoborockDataProtocol(int(data_point_number))
+                            self._logger.debug("Got device update for %s: %s", data_protocol.name, data_point)
+                            if data_protocol in ROBOROCK_DATA_STATUS_PROTOCOL:
+                                if data_protocol not in self.listener_model.protocol_handlers:
+                                    self._logger.debug(
+                                        "Got status update(%s) before get_status was called.", data_protocol.name
                                     )
-                                else:
-                                    result = data_point_response.get("result")
-                                    if isinstance(result, list) and len(result) == 1:
-                                        result = result[0]
-                                    queue.set_result(result)
-                            else:
-                                self._logger.debug("Received response for unknown request id %s", request_id)
-                        else:
-                            try:
-                                data_protocol = RoborockDataProtocol(int(data_point_number))
-                                self._logger.debug(f"Got device update for {data_protocol.name}: {data_point}")
-                                if data_protocol in ROBOROCK_DATA_STATUS_PROTOCOL:
-                                    if data_protocol not in self.listener_model.protocol_handlers:
-                                        self._logger.debug(
-                                            f"Got status update({data_protocol.name}) before get_status was called."
-                                        )
-                                        return
-                                    value = self.listener_model.cache[CacheableAttribute.status].value
-                                    value[data_protocol.name] = data_point
-                                    status = self._status_type.from_dict(value)
-                                    for listener in self.listener_model.protocol_handlers.get(data_protocol, []):
-                                        listener(status)
-                                elif data_protocol in ROBOROCK_DATA_CONSUMABLE_PROTOCOL:
-                                    if data_protocol not in self.listener_model.protocol_handlers:
-                                        self._logger.debug(
-                                            f"Got consumable update({data_protocol.name})"
-                                            + "before get_consumable was called."
-                                        )
-                                        return
-                                    value = self.listener_model.cache[CacheableAttribute.consumable].value
-                                    value[data_protocol.name] = data_point
-                                    consumable = Consumable.from_dict(value)
-                                    for listener in self.listener_model.protocol_handlers.get(data_protocol, []):
-                                        listener(consumable)
-                                elif data_protocol in {
-                                    RoborockDataProtocol.ADDITIONAL_PROPS,
-                                    RoborockDataProtocol.DRYING_STATUS,
-                                }:
-                                    # Known data protocol, but not yet sure how to correctly utilize it.
                                     return
-                                else:
-                                    self._logger.warning(
-                                        f"Unknown data protocol {data_point_number}, please create an "
-                                        f"issue on the python-roborock repository"
+                                value = self.listener_model.cache[CacheableAttribute.status].value
+                                value[data_protocol.name] = data_point
+                                status = self._status_type.from_dict(value)
+                                for listener in self.listener_model.protocol_handlers.get(data_protocol, []):
+                                    listener(status)
+                            elif data_protocol in ROBOROCK_DATA_CONSUMABLE_PROTOCOL:
+                                if data_protocol not in self.listener_model.protocol_handlers:
+                                    self._logger.debug(
+                                        "Got consumable update(%s) before get_consumable was called.",
+                                        data_protocol.name,
                                     )
-                                    self._logger.info(data)
+                                    return
+                                value = self.listener_model.cache[CacheableAttribute.consumable].value
+                                value[data_protocol.name] = data_point
+                                consumable = Consumable.from_dict(value)
+                                for listener in self.listener_model.protocol_handlers.get(data_protocol, []):
+                                    listener(consumable)
+                            elif data_protocol in {
+                                RoborockDataProtocol.ADDITIONAL_PROPS,
+                                RoborockDataProtocol.DRYING_STATUS,
+                            }:
+                                # Known data protocol, but not yet sure how to correctly utilize it.
                                 return
-                            except ValueError:
+                            else:
                                 self._logger.warning(
-                                    f"Got listener data for {data_point_number}, data: {data_point}. "
-                                    f"This lets us update data quicker, please open an issue "
-                                    f"at https://github.com/humbertogontijo/python-roborock/issues"
+                                    "Unknown data protocol %s, please create an "
+                                    "issue on the python-roborock repository",
+                                    data_point_number,
                                 )
-
-                                pass
-                            dps = {data_point_number: data_point}
-                            self._logger.debug(f"Got unknown data point {dps}")
+                                self._logger.info(data)
+                            return
+                        except ValueError:
+                            self._logger.warning(
+                                "Got listener data for %s, data: %s. "
+                                "This lets us update data quicker, please open an issue "
+                                "at https://github.com/humbertogontijo/python-roborock/issues",
+                                data_point_number,
+                                data_point,
+                            )
+
+                            pass
+                        self._logger.debug("Got unknown data point %s", {data_point_number: data_point})
                 elif data.payload and protocol == RoborockMessageProtocol.MAP_RESPONSE:
                     payload = data.payload[0:24]
                     [endpoint, _, request_id, _] = struct.unpack("<8s8sH6s", payload)
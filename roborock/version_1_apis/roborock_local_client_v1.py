@@ -49,7 +49,7 @@ class RoborockLocalClientV1(RoborockLocalClient, RoborockClientV1):
             raise RoborockException(f"Failed build message {roborock_message}")
         msg = self._encoder(roborock_message)
         if method:
-            self._logger.debug(f"id={request_id} Requesting method {method} with {params}")
+            self._logger.debug("id=%s Requesting method %s with %s", request_id, method, params)
         # Send the command to the Roborock device
         async_response = self._async_response(request_id, response_protocol)
         self._send_msg_raw(msg)
@@ -58,16 +58,16 @@ class RoborockLocalClientV1(RoborockLocalClient, RoborockClientV1):
             response = await async_response
         except VacuumError as err:
             self._diagnostic_data[diagnostic_key] = {
-                "params": roborock_message.get_params(),
+                "params": params,
                 "error": err,
             }
             raise CommandVacuumError(method, err) from err
         self._diagnostic_data[diagnostic_key] = {
-            "params": roborock_message.get_params(),
+            "params": params,
             "response": response,
         }
         if roborock_message.protocol == RoborockMessageProtocol.GENERAL_REQUEST:
-            self._logger.debug(f"id={request_id} Response from method {roborock_message.get_method()}: {response}")
+            self._logger.debug("id=%s Response from method %s: %s", request_id, method, response)
         if response == "retry":
             retry_id = roborock_message.get_retry_id()
             return self.send_command(
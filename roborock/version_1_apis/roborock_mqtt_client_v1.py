@@ -1,4 +1,3 @@
-import base64
 import logging
 
 from vacuum_map_parser_base.config.color import ColorsPalette
@@ -10,7 +9,7 @@ from roborock.cloud_api import RoborockMqttClient
 
 from ..containers import DeviceData, UserData
 from ..exceptions import CommandVacuumError, RoborockException, VacuumError
-from ..protocol import Utils
+from ..protocol import create_mqtt_endpoint
 from ..protocols.v1_protocol import SecurityData, create_mqtt_payload_encoder
 from ..roborock_message import (
     RoborockMessage,
@@ -31,7 +30,7 @@ class RoborockMqttClientV1(RoborockMqttClient, RoborockClientV1):
         rriot = user_data.rriot
         if rriot is None:
             raise RoborockException("Got no rriot data from user_data")
-        endpoint = base64.b64encode(Utils.md5(rriot.k.encode())[8:14]).decode()
+        endpoint = create_mqtt_endpoint(rriot.k)
 
         RoborockMqttClient.__init__(self, user_data, device_info)
         RoborockClientV1.__init__(self, device_info, endpoint)
@@ -52,7 +51,7 @@ class RoborockMqttClientV1(RoborockMqttClient, RoborockClientV1):
             RoborockMessageProtocol.MAP_RESPONSE if method in COMMANDS_SECURED else RoborockMessageProtocol.RPC_RESPONSE
         )
         msg = self._encoder(roborock_message)
-        self._logger.debug(f"id={request_id} Requesting method {method} with {params}")
+        self._logger.debug("id=%s Requesting method %s with %s", request_id, method, params)
         async_response = self._async_response(request_id, response_protocol)
         self._send_msg_raw(msg)
         diagnostic_key = method if method is not None else "unknown"
@@ -60,18 +59,18 @@ class RoborockMqttClientV1(RoborockMqttClient, RoborockClientV1):
             response = await async_response
         except VacuumError as err:
             self._diagnostic_data[diagnostic_key] = {
-                "params": roborock_message.get_params(),
+                "params": params,
                 "error": err,
             }
             raise CommandVacuumError(method, err) from err
         self._diagnostic_data[diagnostic_key] = {
-            "params": roborock_message.get_params(),
+            "params": params,
             "response": response,
         }
         if response_protocol == RoborockMessageProtocol.MAP_RESPONSE:
-            self._logger.debug(f"id={request_id} Response from {method}: {len(response)} bytes")
+            self._logger.debug("id=%s Response from %s: %s bytes", request_id, method, len(response))
         else:
-            self._logger.debug(f"id={request_id} Response from {method}: {response}")
+            self._logger.debug("id=%s Response from %s: %s", request_id, method, response)
         return response
 
     async def _send_command(
@@ -13,6 +13,8 @@ from aioresponses import aioresponses
 
 from roborock import HomeData, UserData
 from roborock.containers import DeviceData
+from roborock.protocols.v1_protocol import _payload_template
+from roborock.roborock_message import RoborockMessage
 from roborock.version_1_apis.roborock_local_client_v1 import RoborockLocalClientV1
 from roborock.version_1_apis.roborock_mqtt_client_v1 import RoborockMqttClientV1
 from tests.mock_data import HOME_DATA_RAW, HOME_DATA_SCENES_RAW, TEST_LOCAL_API_HOST, USER_DATA
@@ -25,6 +27,39 @@ RequestHandler = Callable[[bytes], bytes | None]
 QUEUE_TIMEOUT = 10
 
 
+async def drain(n: int = 4) -> None:
+    """Yield to the event loop until pending callbacks and tasks have run.
+
+    Each `asyncio.sleep(0)` runs a single iteration of the ready queue without
+    arming a timer, so tests can deterministically let background work proceed.
+    """
+    for _ in range(n):
+        await asyncio.sleep(0)
+
+
+class SubscriberList(list[RoborockMessage]):
+    """List of messages received by a subscriber that the tests can wait on."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._event = asyncio.Event()
+
+    def append(self, message: RoborockMessage) -> None:
+        """Record a received message and wake up any waiters."""
+        super().append(message)
+        self._event.set()
+
+    async def wait_for(self, count: int, timeout: float = 1.0) -> None:
+        """Wait until at least the specified number of messages are received."""
+
+        async def wait() -> None:
+            while len(self) < count:
+                self._event.clear()
+                await self._event.wait()
+
+        await asyncio.wait_for(wait(), timeout=timeout)
+
+
 class FakeSocketHandler:
     """Fake socket used by the test to simulate a connection to the broker.
 
@@ -75,6 +110,18 @@ class FakeSocketHandler:
             self.response_buf.write(response)
 
 
+@pytest.fixture(name="json_backend", params=["orjson", "stdlib"])
+def json_backend_fixture(request: pytest.FixtureRequest, monkeypatch: pytest.MonkeyPatch) -> str:
+    """Fixture to run a test with and without the optional orjson dependency."""
+    if request.param == "orjson":
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr("roborock.util.orjson", None)
+    # Clear payload templates serialized with the other backend
+    _payload_template.cache_clear()
+    return request.param
+
+
 @pytest.fixture(name="received_requests")
 def received_requests_fixture() -> Queue[bytes]:
     """Fixture that provides access to the received requests."""
@@ -1,5 +1,6 @@
 """Tests for the Device class."""
 
+import dataclasses
 from unittest.mock import AsyncMock, Mock
 
 from roborock.containers import HomeData, UserData
@@ -38,3 +39,35 @@ async def test_device_connection() -> None:
 
     await device.close()
     assert unsub.called
+
+
+async def test_device_features() -> None:
+    """Test that devices reporting the same feature flags share a DeviceFeatures instance."""
+    device1 = RoborockDevice(
+        USER_DATA,
+        device_info=HOME_DATA.devices[0],
+        product_info=HOME_DATA.products[0],
+        mqtt_channel=AsyncMock(),
+    )
+    device2 = RoborockDevice(
+        USER_DATA,
+        device_info=dataclasses.replace(HOME_DATA.devices[0], duid="def456"),
+        product_info=HOME_DATA.products[0],
+        mqtt_channel=AsyncMock(),
+    )
+    features = device1.device_features
+    assert features is not None
+    assert features.show_clean_finish_reason_supported
+    assert not features.resegment_supported
+    assert device2.device_features is features
+
+
+async def test_device_features_not_reported() -> None:
+    """Test devices that do not report feature flags."""
+    device = RoborockDevice(
+        USER_DATA,
+        device_info=dataclasses.replace(HOME_DATA.devices[0], new_feature_set=None),
+        product_info=HOME_DATA.products[0],
+        mqtt_channel=AsyncMock(),
+    )
+    assert device.device_features is None
@@ -13,6 +13,14 @@ from roborock.exceptions import RoborockException
 from .. import mock_data
 
 USER_DATA = UserData.from_dict(mock_data.USER_DATA)
+# Parsed once and shared, the device manager only reads the home data
+HOME_DATA = HomeData.from_dict(mock_data.HOME_DATA_RAW)
+HOME_DATA_NO_DEVICES = HomeData(
+    id=1,
+    name="Test Home",
+    devices=[],
+    products=[],
+)
 
 
 @pytest.fixture(autouse=True)
@@ -26,17 +34,12 @@ def setup_mqtt_session() -> Generator[Mock, None, None]:
 
 async def home_home_data_no_devices() -> HomeData:
     """Mock home data API that returns no devices."""
-    return HomeData(
-        id=1,
-        name="Test Home",
-        devices=[],
-        products=[],
-    )
+    return HOME_DATA_NO_DEVICES
 
 
 async def mock_home_data() -> HomeData:
     """Mock home data API that returns devices."""
-    return HomeData.from_dict(mock_data.HOME_DATA_RAW)
+    return HOME_DATA
 
 
 async def test_no_devices() -> None:
@@ -1,7 +1,6 @@
 """Tests for the LocalChannel class."""
 
 import asyncio
-import json
 from collections.abc import Generator
 from unittest.mock import AsyncMock, Mock, patch
 
@@ -9,50 +8,69 @@ import pytest
 
 from roborock.devices.local_channel import LocalChannel
 from roborock.exceptions import RoborockConnectionException, RoborockException
-from roborock.protocol import create_local_decoder, create_local_encoder
+from roborock.protocol import create_local_encoder
 from roborock.roborock_message import RoborockMessage, RoborockMessageProtocol
 
+from ..conftest import SubscriberList, drain
+
 TEST_HOST = "192.168.1.100"
 TEST_LOCAL_KEY = "local_key"
 TEST_PORT = 58867
 
+# Payloads nest the JSON encoded RPC shown above each message in a data point
+# {"dps": {"101": {"id": 12345, "method": "get_status"}}}
 TEST_REQUEST = RoborockMessage(
     protocol=RoborockMessageProtocol.RPC_REQUEST,
-    payload=json.dumps({"dps": {"101": json.dumps({"id": 12345, "method": "get_status"})}}).encode(),
+    payload=b'{"dps": {"101": "{\\"id\\": 12345, \\"method\\": \\"get_status\\"}"}}',
 )
+# {"dps": {"102": {"id": 12345, "result": {"state": "cleaning"}}}}
 TEST_RESPONSE = RoborockMessage(
     protocol=RoborockMessageProtocol.RPC_RESPONSE,
-    payload=json.dumps({"dps": {"102": json.dumps({"id": 12345, "result": {"state": "cleaning"}})}}).encode(),
+    payload=b'{"dps": {"102": "{\\"id\\": 12345, \\"result\\": {\\"state\\": \\"cleaning\\"}}"}}',
 )
+# {"dps": {"101": {"id": 54321, "method": "get_status"}}}
 TEST_REQUEST2 = RoborockMessage(
     protocol=RoborockMessageProtocol.RPC_REQUEST,
-    payload=json.dumps({"dps": {"101": json.dumps({"id": 54321, "method": "get_status"})}}).encode(),
+    payload=b'{"dps": {"101": "{\\"id\\": 54321, \\"method\\": \\"get_status\\"}"}}',
 )
+# {"dps": {"102": {"id": 54321, "result": {"state": "cleaning"}}}}
 TEST_RESPONSE2 = RoborockMessage(
     protocol=RoborockMessageProtocol.RPC_RESPONSE,
-    payload=json.dumps({"dps": {"102": json.dumps({"id": 54321, "result": {"state": "cleaning"}})}}).encode(),
+    payload=b'{"dps": {"102": "{\\"id\\": 54321, \\"result\\": {\\"state\\": \\"cleaning\\"}}"}}',
 )
 ENCODER = create_local_encoder(TEST_LOCAL_KEY)
-DECODER = create_local_decoder(TEST_LOCAL_KEY)
+# Messages are encoded once and reused by every test
+ENCODED_REQUEST = ENCODER(TEST_REQUEST)
+ENCODED_RESPONSE = ENCODER(TEST_RESPONSE)
+ENCODED_RESPONSE2 = ENCODER(TEST_RESPONSE2)
 
 
-@pytest.fixture(name="mock_transport")
+@pytest.fixture(name="mock_transport", scope="module")
 def setup_mock_transport() -> Mock:
-    """Mock transport for testing."""
+    """Mock transport shared by the tests in this module."""
     transport = Mock()
     transport.write = Mock()
     transport.close = Mock()
     return transport
 
 
-@pytest.fixture(name="mock_loop")
-def setup_mock_loop(mock_transport: Mock) -> Generator[Mock, None, None]:
-    """Mock event loop for testing."""
+@pytest.fixture(name="mock_loop", scope="module")
+def setup_mock_loop(mock_transport: Mock) -> Mock:
+    """Mock event loop shared by the tests in this module."""
     loop = Mock()
     loop.create_connection = AsyncMock(return_value=(mock_transport, Mock()))
+    return loop
+
 
-    with patch("asyncio.get_running_loop", return_value=loop):
-        yield loop
+@pytest.fixture(autouse=True)
+def patch_mock_loop(mock_loop: Mock, mock_transport: Mock) -> Generator[None, None, None]:
+    """Reset the shared mocks and use the mock loop for the duration of a test."""
+    mock_transport.reset_mock()
+    mock_loop.create_connection.reset_mock()
+    mock_loop.create_connection.side_effect = None
+    mock_loop.create_connection.return_value = (mock_transport, Mock())
+    with patch("asyncio.get_running_loop", return_value=mock_loop):
+        yield
 
 
 @pytest.fixture(name="local_channel")
@@ -62,9 +80,9 @@ def setup_local_channel() -> LocalChannel:
 
 
 @pytest.fixture(name="received_messages")
-async def setup_subscribe_callback(local_channel: LocalChannel) -> list[RoborockMessage]:
+async def setup_subscribe_callback(local_channel: LocalChannel) -> SubscriberList:
     """Fixture to record messages received by the subscriber."""
-    messages: list[RoborockMessage] = []
+    messages = SubscriberList()
     await local_channel.subscribe(messages.append)
     return messages
 
@@ -142,24 +160,57 @@ async def test_successful_command_response(local_channel: LocalChannel, mock_loo
 
     # Send command in background task
     command_task = asyncio.create_task(local_channel.send_command(TEST_REQUEST))
-    await asyncio.sleep(0.01)  # yield
+    await drain()
 
     # Simulate receiving response via the protocol callback
-    local_channel._data_received(ENCODER(TEST_RESPONSE))
-    await asyncio.sleep(0.01)  # yield
+    local_channel._data_received(ENCODED_RESPONSE)
+    await drain()
 
     result = await command_task
 
     # Verify command was sent
     mock_transport.write.assert_called_once()
     sent_data = mock_transport.write.call_args[0][0]
-    decoded_sent = next(iter(DECODER(sent_data)))
-    assert decoded_sent == TEST_REQUEST
+    assert sent_data == ENCODED_REQUEST
 
     # Verify response
     assert result == TEST_RESPONSE
 
 
+async def test_command_response_resolved_inline(local_channel: LocalChannel, mock_loop: Mock) -> None:
+    """Test the waiting future is resolved while the response is received."""
+    await local_channel.connect()
+
+    command_task = asyncio.create_task(local_channel.send_command(TEST_REQUEST))
+    await drain()
+    future = local_channel._rpc_waiters.get(12345)
+    assert future
+
+    local_channel._data_received(ENCODED_RESPONSE)
+    # No further event loop iteration is needed to resolve the future
+    assert future.done()
+
+    assert await command_task == TEST_RESPONSE
+
+
+async def test_buffered_protocol_split_frames(
+    local_channel: LocalChannel, received_messages: SubscriberList, mock_loop: Mock
+) -> None:
+    """Test that messages read into the protocol buffer are decoded across reads."""
+    await local_channel.connect()
+    protocol_factory = mock_loop.create_connection.call_args[0][0]
+    protocol = protocol_factory()
+
+    data = ENCODED_RESPONSE + ENCODED_RESPONSE2
+    split = len(data) - 10
+    for chunk in (data[:split], data[split:]):
+        buffer = protocol.get_buffer(-1)
+        buffer[: len(chunk)] = chunk
+        protocol.buffer_updated(len(chunk))
+
+    assert received_messages == [TEST_RESPONSE, TEST_RESPONSE2]
+
+
 async def test_concurrent_commands(local_channel: LocalChannel, mock_loop: Mock, mock_transport: Mock) -> None:
     """Test handling multiple concurrent commands."""
     await local_channel.connect()
@@ -167,13 +218,13 @@ async def test_concurrent_commands(local_channel: LocalChannel, mock_loop: Mock,
     # Start both commands concurrently
     task1 = asyncio.create_task(local_channel.send_command(TEST_REQUEST, timeout=5.0))
     task2 = asyncio.create_task(local_channel.send_command(TEST_REQUEST2, timeout=5.0))
-    await asyncio.sleep(0.01)  # yield
+    await drain()
 
     # Send responses
-    local_channel._data_received(ENCODER(TEST_RESPONSE))
-    await asyncio.sleep(0.01)  # yield
-    local_channel._data_received(ENCODER(TEST_RESPONSE2))
-    await asyncio.sleep(0.01)  # yield
+    local_channel._data_received(ENCODED_RESPONSE)
+    await drain()
+    local_channel._data_received(ENCODED_RESPONSE2)
+    await drain()
 
     # Both should complete successfully
     result1 = await task1
@@ -189,15 +240,15 @@ async def test_duplicate_request_id_prevention(local_channel: LocalChannel, mock
 
     # Start first command
     task1 = asyncio.create_task(local_channel.send_command(TEST_REQUEST, timeout=5.0))
-    await asyncio.sleep(0.01)  # yield
+    await drain()
 
     # Try to start second command with same request ID
     with pytest.raises(RoborockException, match="Request ID 12345 already pending"):
         await local_channel.send_command(TEST_REQUEST, timeout=5.0)
 
     # Complete first command
-    local_channel._data_received(ENCODER(TEST_RESPONSE))
-    await asyncio.sleep(0.01)  # yield
+    local_channel._data_received(ENCODED_RESPONSE)
+    await drain()
 
     result = await task1
     assert result == TEST_RESPONSE
@@ -210,11 +261,14 @@ async def test_command_timeout(local_channel: LocalChannel, mock_loop: Mock) ->
     with pytest.raises(RoborockException, match="Command timed out after 0.1s"):
         await local_channel.send_command(TEST_REQUEST, timeout=0.1)
 
+    # The pending request is cleaned up and the request id may be reused
+    assert not local_channel._rpc_waiters
+
 
 async def test_message_decode_error(local_channel: LocalChannel, caplog: pytest.LogCaptureFixture) -> None:
     """Test handling of message decode errors."""
     local_channel._data_received(b"invalid_payload")
-    await asyncio.sleep(0.01)  # yield
+    await drain()
 
     assert len(caplog.records) == 1
     assert caplog.records[0].levelname == "WARNING"
@@ -222,33 +276,33 @@ async def test_message_decode_error(local_channel: LocalChannel, caplog: pytest.
 
 
 async def test_subscribe_callback(
-    local_channel: LocalChannel, received_messages: list[RoborockMessage], mock_loop: Mock
+    local_channel: LocalChannel, received_messages: SubscriberList, mock_loop: Mock
 ) -> None:
     """Test that subscribe callback receives all messages."""
     await local_channel.connect()
 
     # Send some messages without an RPC
-    local_channel._data_received(ENCODER(TEST_RESPONSE))
-    local_channel._data_received(ENCODER(TEST_RESPONSE2))
-    await asyncio.sleep(0.01)  # yield
+    local_channel._data_received(ENCODED_RESPONSE)
+    local_channel._data_received(ENCODED_RESPONSE2)
+    await received_messages.wait_for(2)
 
     assert received_messages == [TEST_RESPONSE, TEST_RESPONSE2]
 
 
 async def test_subscribe_callback_with_rpc_response(
-    local_channel: LocalChannel, received_messages: list[RoborockMessage], mock_loop: Mock
+    local_channel: LocalChannel, received_messages: SubscriberList, mock_loop: Mock
 ) -> None:
     """Test that subscribe callback is called independent of RPC handling."""
     await local_channel.connect()
 
     # Send request
     task = asyncio.create_task(local_channel.send_command(TEST_REQUEST, timeout=5.0))
-    await asyncio.sleep(0.01)  # yield
+    await drain()
 
     # Send response and unrelated message
-    local_channel._data_received(ENCODER(TEST_RESPONSE))
-    local_channel._data_received(ENCODER(TEST_RESPONSE2))
-    await asyncio.sleep(0.01)  # yield
+    local_channel._data_received(ENCODED_RESPONSE)
+    local_channel._data_received(ENCODED_RESPONSE2)
+    await received_messages.wait_for(2)
 
     # Task completes
     result = await task
@@ -270,8 +324,8 @@ async def test_subscribe_callback_exception_handling(
     await local_channel.connect()
 
     # Send message that will cause callback to fail
-    local_channel._data_received(ENCODER(TEST_RESPONSE))
-    await asyncio.sleep(0.01)  # yield
+    local_channel._data_received(ENCODED_RESPONSE)
+    await drain()
 
     # Should log the exception but not crash
     assert any("Uncaught error in message handler callback" in record.message for record in caplog.records)
@@ -279,24 +333,42 @@ async def test_subscribe_callback_exception_handling(
 
 async def test_unsubscribe(local_channel: LocalChannel, mock_loop: Mock) -> None:
     """Test unsubscribing from messages."""
-    messages: list[RoborockMessage] = []
+    messages = SubscriberList()
     unsubscribe = await local_channel.subscribe(messages.append)
     await local_channel.connect()
 
     # Send message while subscribed
-    local_channel._data_received(ENCODER(TEST_RESPONSE))
-    await asyncio.sleep(0.01)  # yield
+    local_channel._data_received(ENCODED_RESPONSE)
+    await messages.wait_for(1)
     assert len(messages) == 1
 
     # Unsubscribe and send another message
     unsubscribe()
-    local_channel._data_received(ENCODER(TEST_RESPONSE2))
-    await asyncio.sleep(0.01)  # yield
+    local_channel._data_received(ENCODED_RESPONSE2)
+    await drain()
 
     # Should still have only one message
     assert len(messages) == 1
 
 
+async def test_unsubscribe_during_dispatch(local_channel: LocalChannel, mock_loop: Mock) -> None:
+    """Test a subscriber may unsubscribe itself while a message is dispatched."""
+    messages: list[RoborockMessage] = []
+
+    def unsubscribe_self(message: RoborockMessage) -> None:
+        unsubscribe()
+
+    unsubscribe = await local_channel.subscribe(unsubscribe_self)
+    await local_channel.subscribe(messages.append)
+    await local_channel.connect()
+
+    local_channel._data_received(ENCODED_RESPONSE)
+    local_channel._data_received(ENCODED_RESPONSE2)
+
+    # The remaining subscriber still receives every message
+    assert messages == [TEST_RESPONSE, TEST_RESPONSE2]
+
+
 async def test_connection_lost_callback(
     local_channel: LocalChannel, mock_loop: Mock, caplog: pytest.LogCaptureFixture
 ) -> None:
@@ -4,18 +4,19 @@ import asyncio
 import json
 import logging
 from collections.abc import Callable, Generator
-from unittest.mock import AsyncMock, Mock, patch
+from unittest.mock import Mock, patch
 
 import pytest
 
-from roborock.containers import HomeData, UserData
+from roborock.containers import UserData
 from roborock.devices.mqtt_channel import MqttChannel
 from roborock.exceptions import RoborockException
-from roborock.mqtt.session import MqttParams
-from roborock.protocol import create_mqtt_decoder, create_mqtt_encoder
+from roborock.mqtt.session import MqttParams, MqttSessionException
+from roborock.protocol import create_mqtt_encoder
 from roborock.roborock_message import RoborockMessage, RoborockMessageProtocol
 
 from .. import mock_data
+from ..conftest import SubscriberList, drain
 
 USER_DATA = UserData.from_dict(mock_data.USER_DATA)
 TEST_MQTT_PARAMS = MqttParams(
@@ -28,57 +29,83 @@ TEST_MQTT_PARAMS = MqttParams(
 )
 TEST_LOCAL_KEY = "local_key"
 
+# Payloads nest the JSON encoded RPC shown above each message in a data point
+# {"dps": {"101": {"id": 12345, "method": "get_status"}}}
 TEST_REQUEST = RoborockMessage(
     protocol=RoborockMessageProtocol.RPC_REQUEST,
-    payload=json.dumps({"dps": {"101": json.dumps({"id": 12345, "method": "get_status"})}}).encode(),
+    payload=b'{"dps": {"101": "{\\"id\\": 12345, \\"method\\": \\"get_status\\"}"}}',
 )
+# {"dps": {"102": {"id": 12345, "result": {"state": "cleaning"}}}}
 TEST_RESPONSE = RoborockMessage(
     protocol=RoborockMessageProtocol.RPC_RESPONSE,
-    payload=json.dumps({"dps": {"102": json.dumps({"id": 12345, "result": {"state": "cleaning"}})}}).encode(),
+    payload=b'{"dps": {"102": "{\\"id\\": 12345, \\"result\\": {\\"state\\": \\"cleaning\\"}}"}}',
 )
+# {"dps": {"101": {"id": 54321, "method": "get_status"}}}
 TEST_REQUEST2 = RoborockMessage(
     protocol=RoborockMessageProtocol.RPC_REQUEST,
-    payload=json.dumps({"dps": {"101": json.dumps({"id": 54321, "method": "get_status"})}}).encode(),
+    payload=b'{"dps": {"101": "{\\"id\\": 54321, \\"method\\": \\"get_status\\"}"}}',
 )
+# {"dps": {"102": {"id": 54321, "result": {"state": "cleaning"}}}}
 TEST_RESPONSE2 = RoborockMessage(
     protocol=RoborockMessageProtocol.RPC_RESPONSE,
-    payload=json.dumps({"dps": {"102": json.dumps({"id": 54321, "result": {"state": "cleaning"}})}}).encode(),
+    payload=b'{"dps": {"102": "{\\"id\\": 54321, \\"result\\": {\\"state\\": \\"cleaning\\"}}"}}',
 )
 ENCODER = create_mqtt_encoder(TEST_LOCAL_KEY)
-DECODER = create_mqtt_decoder(TEST_LOCAL_KEY)
+# Messages are encoded once and reused by every test
+ENCODED_REQUEST = ENCODER(TEST_REQUEST)
+ENCODED_RESPONSE = ENCODER(TEST_RESPONSE)
+ENCODED_RESPONSE2 = ENCODER(TEST_RESPONSE2)
+
+
+class FakeMqttSession:
+    """Fake MQTT session that records the calls made by the channel."""
+
+    def __init__(self) -> None:
+        self.subscribe_mock = Mock()
+        self.publish_mock = Mock()
+
+    async def subscribe(self, topic: str, callback: Callable[[bytes], None]) -> Callable[[], None]:
+        """Record the subscription and return the unsubscribe callable from the spy."""
+        return self.subscribe_mock(topic, callback)
+
+    async def publish(self, topic: str, message: bytes) -> None:
+        """Record the published message."""
+        self.publish_mock(topic, message)
 
 
 @pytest.fixture(name="mqtt_session", autouse=True)
-def setup_mqtt_session() -> Generator[Mock, None, None]:
+def setup_mqtt_session() -> Generator[FakeMqttSession, None, None]:
     """Fixture to set up the MQTT session for the tests."""
-    mock_session = AsyncMock()
+    mock_session = FakeMqttSession()
     with patch("roborock.devices.device_manager.create_mqtt_session", return_value=mock_session):
         yield mock_session
 
 
-@pytest.fixture(name="mqtt_channel", autouse=True)
-def setup_mqtt_channel(mqtt_session: Mock) -> MqttChannel:
+@pytest.fixture(name="mqtt_channel")
+def setup_mqtt_channel(mqtt_session: FakeMqttSession) -> MqttChannel:
     """Fixture to set up the MQTT channel for the tests."""
     return MqttChannel(
         mqtt_session, duid="abc123", local_key=TEST_LOCAL_KEY, rriot=USER_DATA.rriot, mqtt_params=TEST_MQTT_PARAMS
     )
 
 
-@pytest.fixture(name="received_messages", autouse=True)
-async def setup_subscribe_callback(mqtt_channel: MqttChannel) -> list[RoborockMessage]:
+@pytest.fixture(name="received_messages")
+async def setup_subscribe_callback(mqtt_channel: MqttChannel) -> SubscriberList:
     """Fixture to record messages received by the subscriber."""
-    messages: list[RoborockMessage] = []
+    messages = SubscriberList()
     await mqtt_channel.subscribe(messages.append)
     return messages
 
 
 @pytest.fixture(name="mqtt_message_handler")
-async def setup_message_handler(mqtt_session: Mock, mqtt_channel: MqttChannel) -> Callable[[bytes], None]:
+async def setup_message_handler(
+    mqtt_session: FakeMqttSession, received_messages: SubscriberList
+) -> Callable[[bytes], None]:
     """Fixture to allow simulating incoming MQTT messages."""
-    # Subscribe to set up message handling. We grab the message handler callback
-    # and use it to simulate receiving a response.
-    assert mqtt_session.subscribe
-    subscribe_call_args = mqtt_session.subscribe.call_args
+    # The subscriber fixture sets up message handling. We grab the message
+    # handler callback and use it to simulate receiving a response.
+    assert mqtt_session.subscribe_mock.called
+    subscribe_call_args = mqtt_session.subscribe_mock.call_args
     message_handler = subscribe_call_args[0][1]
     return message_handler
 
@@ -92,38 +119,23 @@ def warning_caplog(
     return caplog
 
 
-async def home_home_data_no_devices() -> HomeData:
-    """Mock home data API that returns no devices."""
-    return HomeData(
-        id=1,
-        name="Test Home",
-        devices=[],
-        products=[],
-    )
-
-
-async def mock_home_data() -> HomeData:
-    """Mock home data API that returns devices."""
-    return HomeData.from_dict(mock_data.HOME_DATA_RAW)
-
-
-async def test_mqtt_channel(mqtt_session: Mock, mqtt_channel: MqttChannel) -> None:
+async def test_mqtt_channel(mqtt_session: FakeMqttSession, mqtt_channel: MqttChannel) -> None:
     """Test MQTT channel setup."""
 
     unsub = Mock()
-    mqtt_session.subscribe.return_value = unsub
+    mqtt_session.subscribe_mock.return_value = unsub
 
     callback = Mock()
     result = await mqtt_channel.subscribe(callback)
 
-    assert mqtt_session.subscribe.called
-    assert mqtt_session.subscribe.call_args[0][0] == "rr/m/o/user123/username/abc123"
+    assert mqtt_session.subscribe_mock.called
+    assert mqtt_session.subscribe_mock.call_args[0][0] == "rr/m/o/user123/username/abc123"
 
     assert result == unsub
 
 
 async def test_send_command_success(
-    mqtt_session: Mock,
+    mqtt_session: FakeMqttSession,
     mqtt_channel: MqttChannel,
     mqtt_message_handler: Callable[[bytes], None],
 ) -> None:
@@ -131,30 +143,27 @@ async def test_send_command_success(
     # Send a test request. We use a task so we can simulate receiving the response
     # while the command is still being processed.
     command_task = asyncio.create_task(mqtt_channel.send_command(TEST_REQUEST))
-    await asyncio.sleep(0.01)  # yield
+    await drain()
 
     # Simulate receiving the response message via MQTT
-    mqtt_message_handler(ENCODER(TEST_RESPONSE))
-    await asyncio.sleep(0.01)  # yield
+    mqtt_message_handler(ENCODED_RESPONSE)
+    await drain()
 
     # Get the result
     result = await command_task
 
     # Verify the command was sent
-    assert mqtt_session.publish.called
-    assert mqtt_session.publish.call_args[0][0] == "rr/m/i/user123/username/abc123"
-    raw_sent_msg = mqtt_session.publish.call_args[0][1]  # == b"encoded_message"
-    decoded_message = next(iter(DECODER(raw_sent_msg)))
-    assert decoded_message == TEST_REQUEST
-    assert decoded_message.protocol == RoborockMessageProtocol.RPC_REQUEST
-    assert decoded_message.get_request_id() == 12345
+    assert mqtt_session.publish_mock.called
+    assert mqtt_session.publish_mock.call_args[0][0] == "rr/m/i/user123/username/abc123"
+    raw_sent_msg = mqtt_session.publish_mock.call_args[0][1]
+    assert raw_sent_msg == ENCODED_REQUEST
 
     # Verify we got the response message back
     assert result == TEST_RESPONSE
 
 
 async def test_send_command_without_request_id(
-    mqtt_session: Mock,
+    mqtt_session: FakeMqttSession,
     mqtt_channel: MqttChannel,
     mqtt_message_handler: Callable[[bytes], None],
 ) -> None:
@@ -170,7 +179,7 @@ async def test_send_command_without_request_id(
 
 
 async def test_concurrent_commands(
-    mqtt_session: Mock,
+    mqtt_session: FakeMqttSession,
     mqtt_channel: MqttChannel,
     mqtt_message_handler: Callable[[bytes], None],
     warning_caplog: pytest.LogCaptureFixture,
@@ -181,14 +190,14 @@ async def test_concurrent_commands(
     # Start both commands concurrently
     task1 = asyncio.create_task(mqtt_channel.send_command(TEST_REQUEST, timeout=5.0))
     task2 = asyncio.create_task(mqtt_channel.send_command(TEST_REQUEST2, timeout=5.0))
-    await asyncio.sleep(0.01)  # yield
+    await drain()
 
     # Create responses for both
-    mqtt_message_handler(ENCODER(TEST_RESPONSE))
-    await asyncio.sleep(0.01)  # yield
+    mqtt_message_handler(ENCODED_RESPONSE)
+    await drain()
 
-    mqtt_message_handler(ENCODER(TEST_RESPONSE2))
-    await asyncio.sleep(0.01)  # yield
+    mqtt_message_handler(ENCODED_RESPONSE2)
+    await drain()
 
     # Both should complete successfully
     result1 = await task1
@@ -201,7 +210,7 @@ async def test_concurrent_commands(
 
 
 async def test_concurrent_commands_same_request_id(
-    mqtt_session: Mock,
+    mqtt_session: FakeMqttSession,
     mqtt_channel: MqttChannel,
     mqtt_message_handler: Callable[[bytes], None],
 ) -> None:
@@ -211,11 +220,11 @@ async def test_concurrent_commands_same_request_id(
     # Start both commands concurrently
     task1 = asyncio.create_task(mqtt_channel.send_command(TEST_REQUEST, timeout=5.0))
     task2 = asyncio.create_task(mqtt_channel.send_command(TEST_REQUEST, timeout=5.0))
-    await asyncio.sleep(0.01)  # yield
+    await drain()
 
     # Create response
-    mqtt_message_handler(ENCODER(TEST_RESPONSE))
-    await asyncio.sleep(0.01)  # yield
+    mqtt_message_handler(ENCODED_RESPONSE)
+    await drain()
 
     # Both should complete successfully
     result1 = await task1
@@ -225,8 +234,29 @@ async def test_concurrent_commands_same_request_id(
         await task2
 
 
+async def test_retry_after_publish_failure(
+    mqtt_session: FakeMqttSession,
+    mqtt_channel: MqttChannel,
+    mqtt_message_handler: Callable[[bytes], None],
+) -> None:
+    """Test a command may be retried with the same request id right after a publish failure."""
+    mqtt_session.publish_mock.side_effect = [MqttSessionException("Publish failed"), None]
+
+    with pytest.raises(MqttSessionException, match="Publish failed"):
+        await mqtt_channel.send_command(TEST_REQUEST)
+
+    # The request id is released before the event loop runs again
+    assert not mqtt_channel._rpc_waiters
+
+    command_task = asyncio.create_task(mqtt_channel.send_command(TEST_REQUEST))
+    await drain()
+
+    mqtt_message_handler(ENCODED_RESPONSE)
+    assert await command_task == TEST_RESPONSE
+
+
 async def test_handle_completed_future(
-    mqtt_session: Mock,
+    mqtt_session: FakeMqttSession,
     mqtt_channel: MqttChannel,
     mqtt_message_handler: Callable[[bytes], None],
     caplog: pytest.LogCaptureFixture,
@@ -234,13 +264,13 @@ async def test_handle_completed_future(
     """Test handling response for an already completed future."""
     # Send request
     task = asyncio.create_task(mqtt_channel.send_command(TEST_REQUEST, timeout=5.0))
-    await asyncio.sleep(0.01)  # yield
+    await drain()
 
     # Send the response twice
-    mqtt_message_handler(ENCODER(TEST_RESPONSE))
-    await asyncio.sleep(0.01)  # yield
-    mqtt_message_handler(ENCODER(TEST_RESPONSE))
-    await asyncio.sleep(0.01)  # yield
+    mqtt_message_handler(ENCODED_RESPONSE)
+    await drain()
+    mqtt_message_handler(ENCODED_RESPONSE)
+    await drain()
 
     # Task completes and second message is not associated with a waiting handler
     result = await task
@@ -248,23 +278,22 @@ async def test_handle_completed_future(
 
 
 async def test_subscribe_callback_with_rpc_response(
-    mqtt_session: Mock,
+    mqtt_session: FakeMqttSession,
     mqtt_channel: MqttChannel,
-    received_messages: list[RoborockMessage],
+    received_messages: SubscriberList,
     mqtt_message_handler: Callable[[bytes], None],
 ) -> None:
     """Test that subscribe callback is called independent of RPC handling."""
     # Send request
     task = asyncio.create_task(mqtt_channel.send_command(TEST_REQUEST, timeout=5.0))
-    await asyncio.sleep(0.01)  # yield
+    await drain()
 
     assert not received_messages
 
     # Send the response for this command and an unrelated command
-    mqtt_message_handler(ENCODER(TEST_RESPONSE))
-    await asyncio.sleep(0.01)  # yield
-    mqtt_message_handler(ENCODER(TEST_RESPONSE2))
-    await asyncio.sleep(0.01)  # yield
+    mqtt_message_handler(ENCODED_RESPONSE)
+    mqtt_message_handler(ENCODED_RESPONSE2)
+    await received_messages.wait_for(2)
 
     # Task completes
     result = await task
@@ -280,8 +309,31 @@ async def test_message_decode_error(
 ) -> None:
     """Test an error during message decoding."""
     mqtt_message_handler(b"invalid_payload")
-    await asyncio.sleep(0.01)  # yield
+    await drain()
 
     assert len(caplog.records) == 1
     assert caplog.records[0].levelname == "WARNING"
     assert "Failed to decode MQTT message" in caplog.records[0].message
+
+
+async def test_large_message_decoded_in_executor(
+    mqtt_channel: MqttChannel,
+    mqtt_message_handler: Callable[[bytes], None],
+    received_messages: SubscriberList,
+) -> None:
+    """Test large payloads are decoded off the event loop."""
+    large_response = RoborockMessage(
+        protocol=RoborockMessageProtocol.RPC_RESPONSE,
+        payload=json.dumps({"dps": {"102": json.dumps({"id": 12345, "result": "x" * 8192})}}).encode(),
+    )
+    command_task = asyncio.create_task(mqtt_channel.send_command(TEST_REQUEST))
+    await drain()
+
+    loop = asyncio.get_running_loop()
+    with patch.object(loop, "run_in_executor", wraps=loop.run_in_executor) as mock_executor:
+        mqtt_message_handler(ENCODER(large_response))
+        result = await command_task
+
+    mock_executor.assert_called_once()
+    assert result == large_response
+    assert received_messages == [large_response]
@@ -0,0 +1,60 @@
+"""Tests for the RpcWaiterTable class."""
+
+import json
+
+import pytest
+
+from roborock.devices.rpc import RpcWaiterTable
+from roborock.exceptions import RoborockException
+from roborock.roborock_message import RoborockMessage, RoborockMessageProtocol
+
+TEST_RESPONSE = RoborockMessage(
+    protocol=RoborockMessageProtocol.RPC_RESPONSE,
+    payload=json.dumps({"dps": {"102": json.dumps({"id": 12345, "result": {"state": "cleaning"}})}}).encode(),
+)
+
+
+async def test_resolve() -> None:
+    """Test a response resolves the future waiting on it."""
+    table = RpcWaiterTable()
+    future = table.register(12345)
+    assert table.get(12345) is future
+
+    table.resolve(TEST_RESPONSE)
+
+    assert future.result() == TEST_RESPONSE
+    assert not table
+
+
+async def test_duplicate_request_id() -> None:
+    """Test a request id may only be registered once while pending."""
+    table = RpcWaiterTable()
+    table.register(12345)
+
+    with pytest.raises(RoborockException, match="Request ID 12345 already pending"):
+        table.register(12345)
+
+
+async def test_cancel() -> None:
+    """Test cancelling a request removes it so the request id may be reused."""
+    table = RpcWaiterTable()
+    future = table.register(12345)
+
+    table.cancel(12345)
+
+    # The entry is removed without waiting for the done callbacks to run
+    assert future.cancelled()
+    assert not table
+    table.register(12345)
+
+
+async def test_resolve_unknown_request() -> None:
+    """Test responses without a waiting request are ignored."""
+    table = RpcWaiterTable()
+    future = table.register(54321)
+
+    table.resolve(TEST_RESPONSE)
+    table.resolve(RoborockMessage(protocol=RoborockMessageProtocol.RPC_RESPONSE, payload=b"invalid"))
+
+    assert not future.done()
+    assert len(table) == 1
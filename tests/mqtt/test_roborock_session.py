@@ -1,6 +1,7 @@
 """Tests for the MQTT session module."""
 
 import asyncio
+import dataclasses
 from collections.abc import Callable, Generator
 from queue import Queue
 from typing import Any
@@ -10,10 +11,10 @@ import aiomqtt
 import paho.mqtt.client as mqtt
 import pytest
 
-from roborock.mqtt.roborock_session import create_mqtt_session
+from roborock.mqtt.roborock_session import RoborockMqttSession, create_mqtt_session
 from roborock.mqtt.session import MqttParams, MqttSessionException
 from tests import mqtt_packet
-from tests.conftest import FakeSocketHandler
+from tests.conftest import FakeSocketHandler, drain
 
 # We mock out the connection so these params are not used/verified
 FAKE_PARAMS = MqttParams(
@@ -31,50 +32,65 @@ def mqtt_server_fixture(mock_create_connection: None, mock_select: None) -> None
     """Fixture to prepare a fake MQTT server."""
 
 
-@pytest.fixture(autouse=True)
-def mock_client_fixture(event_loop: asyncio.AbstractEventLoop) -> Generator[None, None, None]:
+@pytest.fixture(name="kick_read", autouse=True)
+def mock_client_fixture(
+    event_loop: asyncio.AbstractEventLoop, mock_sock: Mock
+) -> Generator[Callable[[], None], None, None]:
     """Fixture to patch the MQTT underlying sync client.
 
     The tests use fake sockets, so this ensures that the async mqtt client does not
-    attempt to listen on them directly. We instead just poll the socket for
-    data ourselves.
+    attempt to listen on them directly. We instead run the client reads and writes
+    ourselves whenever the client has data to send or the fake broker has a
+    response ready. The fixture returns a function to notify the client of data.
     """
 
     orig_class = mqtt.Client
+    clients: list[mqtt.Client] = []
+
+    def read(client: mqtt.Client) -> None:
+        """Read from the socket until all buffered responses are consumed."""
+        client.loop_read()
+        if mock_sock.pending():
+            event_loop.call_soon_threadsafe(read, client)
 
-    async def poll_sockets(client: mqtt.Client) -> None:
-        """Poll the mqtt client sockets in a loop to pick up new data."""
-        while True:
-            event_loop.call_soon_threadsafe(client.loop_read)
-            event_loop.call_soon_threadsafe(client.loop_write)
-            await asyncio.sleep(0.1)
+    def write(client: mqtt.Client) -> None:
+        """Write to the socket and read any response queued by the fake broker."""
+        client.loop_write()
+        event_loop.call_soon_threadsafe(read, client)
 
-    task: asyncio.Task[None] | None = None
+    def register_write(client: mqtt.Client, userdata: Any, sock: Any) -> None:
+        """Write to the socket when the client has outgoing data."""
+        event_loop.call_soon_threadsafe(write, client)
 
     def new_client(*args: Any, **kwargs: Any) -> mqtt.Client:
-        """Create a new mqtt client and start the socket polling task."""
-        nonlocal task
+        """Create a new mqtt client and keep track of it for notifications."""
         client = orig_class(*args, **kwargs)
-        task = event_loop.create_task(poll_sockets(client))
+        clients.append(client)
         return client
 
+    def kick_read() -> None:
+        """Notify the clients that a response is ready to be read."""
+        for client in clients:
+            event_loop.call_soon_threadsafe(read, client)
+
     with patch("aiomqtt.client.Client._on_socket_open"), patch("aiomqtt.client.Client._on_socket_close"), patch(
-        "aiomqtt.client.Client._on_socket_register_write"
+        "aiomqtt.client.Client._on_socket_register_write", side_effect=register_write
     ), patch("aiomqtt.client.Client._on_socket_unregister_write"), patch(
         "aiomqtt.client.mqtt.Client", side_effect=new_client
     ):
-        yield
-        if task:
-            task.cancel()
+        yield kick_read
 
 
 @pytest.fixture
-def push_response(response_queue: Queue, fake_socket_handler: FakeSocketHandler) -> Callable[[bytes], None]:
+def push_response(
+    response_queue: Queue, fake_socket_handler: FakeSocketHandler, kick_read: Callable[[], None]
+) -> Callable[[bytes], None]:
     """Fixtures to push messages."""
 
     def push(message: bytes) -> None:
         response_queue.put(message)
         fake_socket_handler.push_response()
+        kick_read()
 
     return push
 
@@ -98,7 +114,7 @@ class Subscriber:
 
     async def wait(self) -> None:
         """Wait for a message to be received."""
-        await self.event.wait()
+        await asyncio.wait_for(self.event.wait(), timeout=1.0)
         self.event.clear()
 
 
@@ -141,6 +157,28 @@ async def test_session(push_response: Callable[[bytes], None]) -> None:
     assert not session.connected
 
 
+async def test_message_dispatched_once(push_response: Callable[[bytes], None]) -> None:
+    """Test each received message is delivered to a subscriber exactly once."""
+
+    push_response(mqtt_packet.gen_connack(rc=0, flags=2))
+    session = await create_mqtt_session(FAKE_PARAMS)
+
+    push_response(mqtt_packet.gen_suback(mid=1))
+    subscriber = Subscriber()
+    await session.subscribe("topic-1", subscriber.append)
+
+    push_response(mqtt_packet.gen_publish("topic-1", mid=2, payload=b"12345"))
+    await subscriber.wait()
+    await drain()
+    assert subscriber.messages == [b"12345"]
+
+    # Messages bypass the aiomqtt message queue entirely
+    assert session._client is not None
+    assert len(session._client.messages) == 0
+
+    await session.close()
+
+
 async def test_session_no_subscribers(push_response: Callable[[bytes], None]) -> None:
     """Test the MQTT session."""
 
@@ -168,26 +206,86 @@ async def test_publish_command(push_response: Callable[[bytes], None]) -> None:
     assert not session.connected
 
 
-class FakeAsyncIterator:
-    """Fake async iterator that waits for messages to arrive, but they never do.
+def fake_mqtt_client() -> AsyncMock:
+    """Create a fake aiomqtt client that stays connected until it is disconnected.
 
-    This is used for testing exceptions in other client functions.
+    This is used for testing exceptions in other client functions. The session
+    waits on the private disconnect future, which the test may complete.
     """
+    mock_client = AsyncMock()
+    mock_client._disconnected = asyncio.get_running_loop().create_future()
+    return mock_client
+
 
-    def __aiter__(self):
-        return self
+async def test_concurrent_start() -> None:
+    """Test concurrent calls to start share a single connection."""
 
-    async def __anext__(self) -> None:
-        """Iterator that does not generate any messages."""
-        while True:
-            await asyncio.sleep(1)
+    mock_client = fake_mqtt_client()
+
+    mock_aenter = AsyncMock()
+    mock_aenter.return_value = mock_client
+
+    with patch("roborock.mqtt.roborock_session.aiomqtt.Client.__aenter__", mock_aenter):
+        session = RoborockMqttSession(FAKE_PARAMS)
+        await asyncio.gather(session.start(), session.start())
+        assert session.connected
+
+        # Starting a running session does not reconnect
+        await session.start()
+        assert mock_aenter.call_count == 1
+
+        await session.close()
+
+
+async def test_start_while_reconnecting() -> None:
+    """Test starting a session that is reconnecting in the background returns immediately."""
+
+    mock_client = fake_mqtt_client()
+
+    mock_aenter = AsyncMock()
+    mock_aenter.return_value = mock_client
+
+    with patch("roborock.mqtt.roborock_session.aiomqtt.Client.__aenter__", mock_aenter):
+        session = await create_mqtt_session(FAKE_PARAMS)
+        assert session.connected
+
+        mock_client._disconnected.set_exception(aiomqtt.MqttError("Disconnected"))
+        await drain()
+        assert not session.connected
+
+        # The session waits for its backoff instead of reconnecting
+        await session.start()
+        assert not session.connected
+        assert mock_aenter.call_count == 1
+
+        await session.close()
+
+
+async def test_subscriptions_established_on_connect() -> None:
+    """Test subscriptions made while disconnected are established on connect."""
+
+    mock_client = fake_mqtt_client()
+
+    mock_aenter = AsyncMock()
+    mock_aenter.return_value = mock_client
+
+    with patch("roborock.mqtt.roborock_session.aiomqtt.Client.__aenter__", mock_aenter):
+        session = RoborockMqttSession(FAKE_PARAMS)
+        await session.subscribe("topic-1", Subscriber().append)
+        await session.subscribe("topic-2", Subscriber().append)
+        assert not mock_client.subscribe.called
+
+        await session.start()
+
+        assert sorted(call.args[0] for call in mock_client.subscribe.call_args_list) == ["topic-1", "topic-2"]
+
+        await session.close()
 
 
 async def test_publish_failure() -> None:
     """Test an MQTT error is received when publishing a message."""
 
-    mock_client = AsyncMock()
-    mock_client.messages = FakeAsyncIterator()
+    mock_client = fake_mqtt_client()
 
     mock_aenter = AsyncMock()
     mock_aenter.return_value = mock_client
@@ -201,19 +299,130 @@ async def test_publish_failure() -> None:
         with pytest.raises(MqttSessionException, match="Error publishing message"):
             await session.publish("topic-1", message=b"payload")
 
+        await session.close()
+
+
+async def test_publish_batch() -> None:
+    """Test concurrent publishes are all sent by the publish task."""
+
+    mock_client = fake_mqtt_client()
+
+    mock_aenter = AsyncMock()
+    mock_aenter.return_value = mock_client
+
+    with patch("roborock.mqtt.roborock_session.aiomqtt.Client.__aenter__", mock_aenter):
+        session = await create_mqtt_session(FAKE_PARAMS)
+        assert session.connected
+
+        await asyncio.gather(*(session.publish(f"topic-{i}", message=b"payload") for i in range(5)))
+
+        assert [call.args for call in mock_client.publish.call_args_list] == [
+            (f"topic-{i}", b"payload") for i in range(5)
+        ]
+
+        await session.close()
+
+
+async def test_publish_while_connecting() -> None:
+    """Test publishing fails immediately while the connection is being set up."""
+
+    subscribe_started = asyncio.Event()
+    release_subscribe = asyncio.Event()
+
+    async def subscribe(topic: str) -> None:
+        subscribe_started.set()
+        await release_subscribe.wait()
+        raise aiomqtt.MqttError("Subscribe failed")
+
+    mock_client = fake_mqtt_client()
+    mock_client.subscribe.side_effect = subscribe
+
+    mock_aenter = AsyncMock()
+    mock_aenter.return_value = mock_client
+
+    with patch("roborock.mqtt.roborock_session.aiomqtt.Client.__aenter__", mock_aenter):
+        session = RoborockMqttSession(FAKE_PARAMS)
+        await session.subscribe("topic-1", Subscriber().append)
+        start_task = asyncio.create_task(session.start())
+        await subscribe_started.wait()
+
+        with pytest.raises(MqttSessionException, match="MQTT client not connected"):
+            await session.publish("topic-1", message=b"payload")
+
+        release_subscribe.set()
+        with pytest.raises(MqttSessionException):
+            await start_task
+
+        assert not mock_client.publish.called
+
+
+async def test_cancelled_publish_not_sent() -> None:
+    """Test a queued message is not sent once its caller stops waiting."""
+
+    release_publish = asyncio.Event()
+
+    async def publish(topic: str, message: bytes) -> None:
+        await release_publish.wait()
+
+    mock_client = fake_mqtt_client()
+    mock_client.publish.side_effect = publish
+
+    mock_aenter = AsyncMock()
+    mock_aenter.return_value = mock_client
+
+    with patch("roborock.mqtt.roborock_session.aiomqtt.Client.__aenter__", mock_aenter):
+        session = await create_mqtt_session(FAKE_PARAMS)
+
+        # The first message is in flight while the second waits in the queue
+        first = asyncio.create_task(session.publish("topic-1", message=b"first"))
+        await drain()
+        second = asyncio.create_task(session.publish("topic-2", message=b"second"))
+        await drain()
+        second.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await second
+
+        release_publish.set()
+        await first
+        await drain()
+
+        assert [call.args for call in mock_client.publish.call_args_list] == [("topic-1", b"first")]
+
+        await session.close()
+
+
+async def test_publish_timeout() -> None:
+    """Test publishing is bounded by the session timeout."""
+
+    async def publish(topic: str, message: bytes) -> None:
+        await asyncio.Event().wait()
+
+    mock_client = fake_mqtt_client()
+    mock_client.publish.side_effect = publish
+
+    mock_aenter = AsyncMock()
+    mock_aenter.return_value = mock_client
+
+    with patch("roborock.mqtt.roborock_session.aiomqtt.Client.__aenter__", mock_aenter):
+        session = await create_mqtt_session(dataclasses.replace(FAKE_PARAMS, timeout=0.01))
+
+        with pytest.raises(MqttSessionException, match="Timeout publishing message"):
+            await session.publish("topic-1", message=b"payload")
+
+        await session.close()
+
 
 async def test_subscribe_failure() -> None:
     """Test an MQTT error while subscribing."""
 
-    mock_client = AsyncMock()
-    mock_client.messages = FakeAsyncIterator()
+    mock_client = fake_mqtt_client()
 
     mock_aenter = AsyncMock()
     mock_aenter.return_value = mock_client
 
     mock_shim = Mock()
     mock_shim.return_value.__aenter__ = mock_aenter
-    mock_shim.return_value.__aexit__ = AsyncMock()
+    mock_shim.return_value.__aexit__ = AsyncMock(return_value=False)
 
     with patch("roborock.mqtt.roborock_session.aiomqtt.Client", mock_shim):
         session = await create_mqtt_session(FAKE_PARAMS)
@@ -226,3 +435,5 @@ async def test_subscribe_failure() -> None:
             await session.subscribe("topic-1", subscriber1.append)
 
         assert not subscriber1.messages
+
+        await session.close()
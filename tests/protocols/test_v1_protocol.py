@@ -0,0 +1,49 @@
+"""Tests for the V1 protocol encoder."""
+
+import json
+
+import pytest
+
+from roborock.protocols.v1_protocol import RequestMessage, SecurityData
+from roborock.roborock_typing import RoborockCommand
+
+pytestmark = pytest.mark.usefixtures("json_backend")
+
+SECURITY_DATA = SecurityData(endpoint="abc+/=", nonce=b"\x01\x02\xab")
+
+
+def stdlib_payload(request: RequestMessage, security_data: SecurityData | None) -> bytes:
+    """Build the payload with two stdlib JSON passes, the reference encoding."""
+    inner = {
+        "id": request.request_id,
+        "method": request.method,
+        "params": request.params or [],
+        **(security_data.to_dict() if security_data else {}),
+    }
+    return json.dumps(
+        {"dps": {"101": json.dumps(inner, separators=(",", ":"))}, "t": request.timestamp},
+        separators=(",", ":"),
+    ).encode()
+
+
+@pytest.mark.parametrize("security_data", [None, SECURITY_DATA])
+@pytest.mark.parametrize(
+    ("method", "params"),
+    [
+        (RoborockCommand.GET_STATUS, None),
+        (RoborockCommand.GET_STATUS, []),
+        ('get_%d_"quoted"', None),
+        (RoborockCommand.SET_CUSTOM_MODE, [102]),
+        (RoborockCommand.APP_SEGMENT_CLEAN, [{"segments": [16, 17], "repeat": 1}]),
+        (RoborockCommand.NAME_SEGMENT, [{"segment_id": 16, "name": "K\u00fcche \U0001f373"}]),
+        ("get_st\u00e4tus", None),
+    ],
+)
+def test_as_payload(method: str, params: list | None, security_data: SecurityData | None) -> None:
+    """Test the payload matches the reference encoding for templated and generic requests."""
+    request = RequestMessage(method=method, params=params, timestamp=1700000000, request_id=12345)
+    assert request.as_payload(security_data) == stdlib_payload(request, security_data)
+
+    # Templated payloads are reused for the next request of the same method
+    request2 = RequestMessage(method=method, params=params, timestamp=1700000001, request_id=23456)
+    assert request2.as_payload(security_data) == stdlib_payload(request2, security_data)
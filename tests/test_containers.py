@@ -9,6 +9,7 @@ from roborock.code_mappings import (
     RoborockMopModeS7,
     RoborockStateCode,
 )
+from roborock.containers import MultiMapsList, MultiMapsListMapInfoBakMaps
 
 from .mock_data import (
     CLEAN_RECORD,
@@ -100,6 +101,17 @@ def test_home_data():
     assert hd.rooms[0].name == "Example room 1"
 
 
+def test_home_data_device_products():
+    hd = HomeData.from_dict(HOME_DATA_RAW)
+    device_products = hd.device_products
+    assert list(device_products) == ["abc123"]
+    device, product = device_products["abc123"]
+    assert device is hd.devices[0]
+    assert product is hd.products[0]
+    # The mapping is built once and reused on every access
+    assert hd.device_products is device_products
+
+
 def test_serialize_and_unserialize():
     ud = UserData.from_dict(USER_DATA)
     ud_dict = ud.as_dict()
@@ -213,3 +225,31 @@ def test_no_value():
     assert s.dock_type == RoborockDockTypeCode.unknown
     assert -9999 not in RoborockDockTypeCode.keys()
     assert "missing" not in RoborockDockTypeCode.values()
+
+
+def test_multi_maps_list():
+    mml = MultiMapsList.from_dict(
+        {
+            "maxMultiMap": 4,
+            "maxBakMap": 1,
+            "multiMapCount": 2,
+            "mapInfo": [
+                {"mapFlag": 0, "addTime": 1686235489, "length": 8, "name": "Downstairs", "bakMaps": []},
+                {
+                    "mapFlag": 1,
+                    "addTime": 1690497843,
+                    "length": 0,
+                    "name": "Upstairs",
+                    "bakMaps": [{"mapflag": 4, "addTime": 1690497844}],
+                },
+            ],
+        }
+    )
+    assert mml.max_multi_map == 4
+    assert mml.multi_map_count == 2
+    downstairs, upstairs = mml.map_info
+    assert downstairs.mapFlag == 0
+    assert downstairs.name == "Downstairs"
+    assert downstairs.bak_maps is None
+    assert upstairs.mapFlag == 1
+    assert upstairs.bak_maps == [MultiMapsListMapInfoBakMaps(mapflag=4, add_time=1690497844)]
@@ -1,4 +1,5 @@
 import json
+from unittest.mock import patch
 
 from freezegun import freeze_time
 
@@ -27,3 +28,18 @@ def test_roborock_message() -> None:
     assert message1.seq != message2.seq
     assert message1.random != message2.random
     assert message1.timestamp > message2.timestamp
+
+
+def test_request_id_cached() -> None:
+    """Test the request id is parsed once and refreshed when the payload changes."""
+    message = RoborockMessage(
+        protocol=RoborockMessageProtocol.RPC_RESPONSE,
+        payload=json.dumps({"dps": {"102": json.dumps({"id": 333})}}).encode(),
+    )
+    with patch("roborock.roborock_message.json.loads", wraps=json.loads) as mock_loads:
+        assert message.get_request_id() == 333
+        assert message.get_request_id() == 333
+    assert mock_loads.call_count == 2  # Envelope and data point parsed once
+
+    message.payload = json.dumps({"dps": {"102": json.dumps({"id": 444})}}).encode()
+    assert message.get_request_id() == 444
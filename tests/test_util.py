@@ -1,8 +1,10 @@
 import datetime
+import json
+from typing import Any
 
 import pytest
 
-from roborock.util import parse_time_to_datetime
+from roborock.util import json_dumps, json_loads, parse_time_to_datetime
 
 
 @pytest.mark.skip
@@ -63,3 +65,21 @@ def test_start_date_greater_than_end_date_greater_than_now():
         (datetime.datetime.now() + datetime.timedelta(hours=1)).time(),
     )
     assert validate(start, end)
+
+
+@pytest.mark.usefixtures("json_backend")
+@pytest.mark.parametrize(
+    "value",
+    [
+        {"id": 1, "method": "get_status", "params": []},
+        {"dps": {"102": '{"id":1,"result":["ok"]}'}, "t": 1700000000},
+        {"name": "K\u00fcche \U0001f373", 101: [1.5, None, True]},
+        {"\u00e9": "line\u2028separator"},
+        {"name": "delete\x7f"},
+    ],
+)
+def test_json_dumps_matches_stdlib(value: Any) -> None:
+    """Test the JSON helpers produce the same bytes whether or not orjson is installed."""
+    data = json_dumps(value)
+    assert data == json.dumps(value, separators=(",", ":")).encode()
+    assert json_loads(data) == json.loads(data)